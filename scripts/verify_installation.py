@@ -3,9 +3,11 @@ Verify Installation Script
 Checks if all dependencies are properly installed
 """
 
+import os
 import sys
 import subprocess
-import importlib
+from importlib import metadata
+from importlib.util import find_spec
 from pathlib import Path
 
 
@@ -34,29 +36,36 @@ def check_python_packages():
     """Check Python packages"""
     print("\nChecking Python packages...")
     
+    # package name -> (import name, distribution name)
     required_packages = {
-        'numpy': 'numpy',
-        'opencv-python': 'cv2',
-        'torch': 'torch',
-        'torchvision': 'torchvision',
-        'ultralytics': 'ultralytics',
-        'scipy': 'scipy',
-        'matplotlib': 'matplotlib',
-        'pandas': 'pandas',
-        'yaml': 'yaml',
-        'tqdm': 'tqdm',
+        'numpy': ('numpy', 'numpy'),
+        'opencv-python': ('cv2', 'opencv-python'),
+        'torch': ('torch', 'torch'),
+        'torchvision': ('torchvision', 'torchvision'),
+        'ultralytics': ('ultralytics', 'ultralytics'),
+        'scipy': ('scipy', 'scipy'),
+        'matplotlib': ('matplotlib', 'matplotlib'),
+        'pandas': ('pandas', 'pandas'),
+        'yaml': ('yaml', 'PyYAML'),
+        'tqdm': ('tqdm', 'tqdm'),
     }
     
     all_ok = True
     
-    for package_name, import_name in required_packages.items():
+    # Read versions from dist-info metadata instead of importing the
+    # (often heavy) modules themselves
+    for package_name, (import_name, dist_name) in required_packages.items():
         try:
-            module = importlib.import_module(import_name)
-            version = getattr(module, '__version__', 'unknown')
-            print(f"  ✓ {package_name}: {version}")
-        except ImportError:
-            print(f"  ✗ {package_name}: NOT INSTALLED")
-            all_ok = False
+            pkg_version = metadata.version(dist_name)
+            print(f"  ✓ {package_name}: {pkg_version}")
+        except metadata.PackageNotFoundError:
+            # Installed under a different distribution name
+            # (e.g. opencv-contrib-python)
+            if find_spec(import_name) is not None:
+                print(f"  ✓ {package_name}: unknown")
+            else:
+                print(f"  ✗ {package_name}: NOT INSTALLED")
+                all_ok = False
     
     return all_ok
 
@@ -127,12 +136,15 @@ def check_yolo_models():
     all_ok = True
     for model_name in required_models:
         model_path = models_dir / model_name
-        if model_path.exists():
-            size_mb = model_path.stat().st_size / (1024 * 1024)
-            print(f"  ✓ {model_name}: {size_mb:.1f} MB")
-        else:
+        # Single stat() call instead of exists() + stat()
+        try:
+            st = model_path.stat()
+        except FileNotFoundError:
             print(f"  ✗ {model_name}: NOT FOUND")
             all_ok = False
+            continue
+        size_mb = st.st_size / (1 << 20)
+        print(f"  ✓ {model_name}: {size_mb:.1f} MB")
     
     if not all_ok:
         print("\n  Download with:")
@@ -155,7 +167,9 @@ def check_datasets():
             # Check if train directory exists
             train_path = dataset_path / 'train'
             if train_path.exists():
-                n_sequences = len(list(train_path.glob('MOT*')))
+                # Count entries without materializing Path objects
+                with os.scandir(train_path) as entries:
+                    n_sequences = sum(1 for e in entries if e.name.startswith('MOT'))
                 print(f"  ✓ {dataset}: {n_sequences} sequences")
                 found_any = True
             else:
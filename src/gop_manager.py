@@ -28,6 +28,143 @@ class FrameInfo:
     is_keyframe: bool  # Whether to run detector on this frame
 
 
+# Frame type codes used by the array (struct-of-arrays) representation
+_FRAME_TYPE_CODES = (FrameType.I, FrameType.P, FrameType.B)
+_I_FRAME, _P_FRAME, _B_FRAME = range(3)
+
+
+class FrameTable:
+    """
+    Struct-of-arrays frame structure
+    
+    One NumPy column per FrameInfo field, in display (POC) order.
+    Reference frames are stored CSR-style: the references of row i are
+    ref_idx[ref_ptr[i]:ref_ptr[i + 1]]. FrameInfo objects are only built
+    on demand via frame() / to_frames().
+    """
+    
+    __slots__ = ('index', 'type', 'poc', 'temporal_layer', 'qp_offset',
+                 'is_keyframe', 'ref_ptr', 'ref_idx', '_position')
+    
+    def __init__(self,
+                 index: np.ndarray,
+                 type: np.ndarray,
+                 poc: np.ndarray,
+                 temporal_layer: np.ndarray,
+                 qp_offset: np.ndarray,
+                 is_keyframe: np.ndarray,
+                 ref_ptr: np.ndarray,
+                 ref_idx: np.ndarray):
+        """
+        Initialize frame table
+        
+        Args:
+            index: Frame indices (N,) int32
+            type: Frame type codes (N,) int8, see _FRAME_TYPE_CODES
+            poc: Picture Order Counts (N,) int32
+            temporal_layer: Temporal layers (N,) int8
+            qp_offset: QP offsets (N,) int8
+            is_keyframe: Keyframe flags (N,) bool
+            ref_ptr: Reference offsets (N + 1,) int32
+            ref_idx: Concatenated reference frame indices int32
+        """
+        self.index = index
+        self.type = type
+        self.poc = poc
+        self.temporal_layer = temporal_layer
+        self.qp_offset = qp_offset
+        self.is_keyframe = is_keyframe
+        self.ref_ptr = ref_ptr
+        self.ref_idx = ref_idx
+        
+        # Frame index -> row lookup (-1 = frame not in structure)
+        size = int(index.max()) + 1 if len(index) else 0
+        self._position = np.full(size, -1, dtype=np.int32)
+        self._position[index] = np.arange(len(index), dtype=np.int32)
+    
+    def __len__(self) -> int:
+        return len(self.index)
+    
+    def find(self, frame_idx: int) -> int:
+        """
+        Get row of a frame index
+        
+        Args:
+            frame_idx: Frame index
+            
+        Returns:
+            Row in the table, or -1 if the frame is not present
+        """
+        if 0 <= frame_idx < len(self._position):
+            return int(self._position[frame_idx])
+        return -1
+    
+    def ref_frames(self, row: int) -> List[int]:
+        """
+        Get reference frame indices of a row
+        
+        Args:
+            row: Row in the table
+            
+        Returns:
+            List of reference frame indices
+        """
+        return self.ref_idx[self.ref_ptr[row]:self.ref_ptr[row + 1]].tolist()
+    
+    def frame(self, row: int) -> FrameInfo:
+        """
+        Materialize a single row as FrameInfo
+        
+        Args:
+            row: Row in the table
+            
+        Returns:
+            FrameInfo object
+        """
+        return FrameInfo(
+            index=int(self.index[row]),
+            type=_FRAME_TYPE_CODES[self.type[row]],
+            poc=int(self.poc[row]),
+            temporal_layer=int(self.temporal_layer[row]),
+            qp_offset=int(self.qp_offset[row]),
+            ref_frames=self.ref_frames(row),
+            is_keyframe=bool(self.is_keyframe[row])
+        )
+    
+    def to_frames(self) -> List[FrameInfo]:
+        """
+        Materialize all rows as FrameInfo objects
+        
+        Returns:
+            List of FrameInfo objects
+        """
+        ref_ptr = self.ref_ptr.tolist()
+        ref_idx = self.ref_idx.tolist()
+        columns = zip(
+            self.index.tolist(),
+            self.type.tolist(),
+            self.poc.tolist(),
+            self.temporal_layer.tolist(),
+            self.qp_offset.tolist(),
+            self.is_keyframe.tolist(),
+            ref_ptr[:-1],
+            ref_ptr[1:],
+        )
+        return [
+            FrameInfo(
+                index=index,
+                type=_FRAME_TYPE_CODES[type_code],
+                poc=poc,
+                temporal_layer=layer,
+                qp_offset=qp_offset,
+                ref_frames=ref_idx[ref_start:ref_end],
+                is_keyframe=is_keyframe
+            )
+            for index, type_code, poc, layer, qp_offset, is_keyframe, ref_start, ref_end
+            in columns
+        ]
+
+
 class GOPManager:
     """
     Manages GOP structure for different VVC configurations
@@ -50,26 +187,66 @@ class GOPManager:
         self.temporal_config = config['roi_detection']['temporal']
         self.keyframe_interval = self.temporal_config.get('keyframe_interval', self.gop_size)
         
+        # QP offsets for hierarchical levels (from config or default)
+        self.ra_qp_offsets = self.encoder_config.get('qp_offset_list', [1, 2, 3, 4])
+        
+        # Number of temporal layers: floor(log2(gop_size)) + 1
+        self._n_layers = int(self.gop_size).bit_length()
+        
+        # Full mini-GOP B-frame layout, shifted per mini-GOP in RA
+        self._mini_gop_template = self._build_mini_gop_template()
+        
+        # Frame structure caches, keyed by n_frames
+        # The structure depends only on the (fixed) config and n_frames
+        self._table_cache: Dict[int, FrameTable] = {}
+        self._struct_cache: Dict[int, List[FrameInfo]] = {}
+    
     def generate_frame_structure(self, n_frames: int) -> List[FrameInfo]:
         """
         Generate frame structure for entire sequence
         
+        The result is cached per n_frames and shared between calls,
+        so callers must not mutate it.
+        
         Args:
             n_frames: Total number of frames
             
         Returns:
             List of FrameInfo objects
         """
+        frames = self._struct_cache.get(n_frames)
+        if frames is None:
+            frames = self.get_frame_table(n_frames).to_frames()
+            self._struct_cache[n_frames] = frames
+        return frames
+    
+    def get_frame_table(self, n_frames: int) -> FrameTable:
+        """
+        Get frame structure as a struct-of-arrays table (cached)
+        
+        Args:
+            n_frames: Total number of frames
+            
+        Returns:
+            FrameTable in display order
+        """
+        table = self._table_cache.get(n_frames)
+        if table is not None:
+            return table
+        
         if self.config_type == "AI":
-            return self._generate_ai_structure(n_frames)
+            table = self._generate_ai_structure(n_frames)
         elif self.config_type == "RA":
-            return self._generate_ra_structure(n_frames)
+            table = self._generate_ra_structure(n_frames)
         elif self.config_type == "LDP":
-            return self._generate_ldp_structure(n_frames)
+            table = self._generate_ldp_structure(n_frames)
         else:
             raise ValueError(f"Unknown config type: {self.config_type}")
+        
+        self._table_cache[n_frames] = table
+        return table
     
-    def _generate_ai_structure(self, n_frames: int) -> List[FrameInfo]:
+    def _generate_ai_structure(self, n_frames: int) -> FrameTable:
         """
         Generate All-Intra structure (all frames are I-frames)
         
@@ -77,23 +254,42 @@ class GOPManager:
             n_frames: Total number of frames
             
         Returns:
-            List of FrameInfo objects
+            FrameTable
         """
-        frames = []
-        for i in range(n_frames):
-            frame = FrameInfo(
-                index=i,
-                type=FrameType.I,
-                poc=i,
-                temporal_layer=0,
-                qp_offset=0,
-                ref_frames=[],
-                is_keyframe=True  # All frames are keyframes in AI
-            )
-            frames.append(frame)
-        return frames
+        idx = np.arange(n_frames, dtype=np.int32)
+        return FrameTable(
+            index=idx,
+            type=np.full(n_frames, _I_FRAME, dtype=np.int8),
+            poc=idx,
+            temporal_layer=np.zeros(n_frames, dtype=np.int8),
+            qp_offset=np.zeros(n_frames, dtype=np.int8),
+            is_keyframe=np.ones(n_frames, dtype=bool),  # All frames are keyframes in AI
+            ref_ptr=np.zeros(n_frames + 1, dtype=np.int32),
+            ref_idx=np.zeros(0, dtype=np.int32)
+        )
+    
+    def _build_mini_gop_template(self) -> np.ndarray:
+        """
+        Build the B-frame layout of one full mini-GOP
+        
+        The hierarchy only depends on gop_size, so it is generated once and
+        shifted to every full mini-GOP instead of re-running the traversal.
+        
+        Returns:
+            Template (n_rows, 5) int32 with columns
+            (offset, temporal_layer, qp_offset, ref0_offset, ref1_offset),
+            all offsets relative to the mini-GOP start
+        """
+        # Start at 1 so that, as in every RA mini-GOP, start > 0
+        rows = self._generate_hierarchical_b_frames(
+            1, 1 + self.gop_size, self.ra_qp_offsets
+        )
+        template = np.zeros((len(rows), 5), dtype=np.int32)
+        for r, (mid, _, layer, qp_offset, _, refs) in enumerate(rows):
+            template[r] = (mid - 1, layer, qp_offset, refs[0] - 1, refs[1] - 1)
+        return template
     
-    def _generate_ra_structure(self, n_frames: int) -> List[FrameInfo]:
+    def _generate_ra_structure(self, n_frames: int) -> FrameTable:
         """
         Generate Random Access structure with hierarchical B-frames
         
@@ -101,44 +297,102 @@ class GOPManager:
             n_frames: Total number of frames
             
         Returns:
-            List of FrameInfo objects
+            FrameTable
         """
-        frames = []
+        template = self._mini_gop_template
         
-        # QP offsets for hierarchical levels (from config or default)
-        qp_offsets = self.encoder_config.get('qp_offset_list', [1, 2, 3, 4])
+        i_starts = []  # I-frame indices
+        full_starts = []  # Starts of full mini-GOPs (use the template)
+        # Rows of partial mini-GOPs:
+        # (index, type, temporal_layer, qp_offset, is_keyframe, refs)
+        partial_rows = []
         
         for gop_start in range(0, n_frames, self.intra_period):
             gop_end = min(gop_start + self.intra_period, n_frames)
             
             # First frame of GOP is I-frame
-            frames.append(FrameInfo(
-                index=gop_start,
-                type=FrameType.I,
-                poc=gop_start,
-                temporal_layer=0,
-                qp_offset=0,
-                ref_frames=[],
-                is_keyframe=True
-            ))
+            i_starts.append(gop_start)
             
-            # Generate hierarchical B-frames
+            # Hierarchical B-frames
             for mini_gop_start in range(gop_start + 1, gop_end, self.gop_size):
                 mini_gop_end = min(mini_gop_start + self.gop_size, gop_end)
-                mini_gop_frames = self._generate_hierarchical_b_frames(
-                    mini_gop_start, mini_gop_end, qp_offsets
-                )
-                frames.extend(mini_gop_frames)
-        
-        # Sort by POC for display order
-        frames.sort(key=lambda x: x.poc)
-        
-        return frames
+                if mini_gop_end - mini_gop_start == self.gop_size:
+                    full_starts.append(mini_gop_start)
+                else:
+                    partial_rows.extend(self._generate_hierarchical_b_frames(
+                        mini_gop_start, mini_gop_end, self.ra_qp_offsets
+                    ))
+        
+        # I-frames
+        i_idx = np.array(i_starts, dtype=np.int32)
+        n_i = len(i_idx)
+        
+        # Full mini-GOPs: shift the template to each start
+        starts = np.array(full_starts, dtype=np.int32)[:, None]
+        n_full = starts.size * len(template)
+        full_idx = (starts + template[:, 0]).ravel()
+        full_refs = np.stack([(starts + template[:, 3]).ravel(),
+                              (starts + template[:, 4]).ravel()], axis=1)
+        
+        # Partial mini-GOPs
+        n_part = len(partial_rows)
+        part_idx = np.array([r[0] for r in partial_rows], dtype=np.int32)
+        part_refs = np.full((n_part, 2), -1, dtype=np.int32)
+        part_counts = np.zeros(n_part, dtype=np.int32)
+        for r, row in enumerate(partial_rows):
+            refs = row[5]
+            part_refs[r, :len(refs)] = refs
+            part_counts[r] = len(refs)
+        
+        # Concatenate and sort by POC (= index) for display order
+        index = np.concatenate((i_idx, full_idx, part_idx))
+        order = np.argsort(index, kind='stable')
+        index = index[order]
+        
+        layers = np.concatenate((
+            np.zeros(n_i, dtype=np.int32),
+            np.tile(template[:, 1], len(full_starts)),
+            np.array([r[2] for r in partial_rows], dtype=np.int32),
+        ))[order]
+        qp_offset = np.concatenate((
+            np.zeros(n_i, dtype=np.int32),
+            np.tile(template[:, 2], len(full_starts)),
+            np.array([r[3] for r in partial_rows], dtype=np.int32),
+        ))[order]
+        types = np.concatenate((
+            np.full(n_i, _I_FRAME, dtype=np.int8),
+            np.full(n_full + n_part, _B_FRAME, dtype=np.int8),
+        ))[order]
+        is_keyframe = (types == _I_FRAME) | ((index % self.keyframe_interval) == 0)
+        
+        refs = np.concatenate((
+            np.full((n_i, 2), -1, dtype=np.int32),
+            full_refs.reshape(-1, 2),
+            part_refs,
+        ))[order]
+        ref_counts = np.concatenate((
+            np.zeros(n_i, dtype=np.int32),
+            np.full(n_full, 2, dtype=np.int32),
+            part_counts,
+        ))[order]
+        ref_ptr = np.zeros(len(index) + 1, dtype=np.int32)
+        np.cumsum(ref_counts, out=ref_ptr[1:])
+        
+        return FrameTable(
+            index=index,
+            type=types,
+            poc=index,
+            temporal_layer=layers.astype(np.int8),
+            qp_offset=qp_offset.astype(np.int8),
+            is_keyframe=is_keyframe,
+            ref_ptr=ref_ptr,
+            ref_idx=refs[np.arange(2) < ref_counts[:, None]]
+        )
     
-    def _generate_hierarchical_b_frames(self, 
-                                       start: int, 
+    def _generate_hierarchical_b_frames(self,
+                                       start: int,
                                        end: int,
-                                       qp_offsets: List[int]) -> List[FrameInfo]:
+                                       qp_offsets: List[int]) -> List[tuple]:
         """
         Generate hierarchical B-frame structure for a mini-GOP
         
@@ -148,49 +402,51 @@ class GOPManager:
             qp_offsets: QP offsets for each temporal layer
             
         Returns:
-            List of FrameInfo objects
+            List of (index, type, temporal_layer, qp_offset, is_keyframe, refs) rows
         """
-        frames = []
+        rows = []
         n_frames = end - start
         
         if n_frames <= 0:
-            return frames
-        
-        # Calculate number of temporal layers
-        n_layers = int(np.log2(self.gop_size)) + 1
+            return rows
         
         # Generate frames in coding order (hierarchical)
         self._add_hierarchical_frames(
-            frames, start, end, 0, n_layers, qp_offsets
+            rows, start, end, 0, self._n_layers, qp_offsets
         )
         
-        return frames
+        return rows
     
     def _add_hierarchical_frames(self,
-                                frames: List[FrameInfo],
+                                rows: List[tuple],
                                 start: int,
                                 end: int,
                                 layer: int,
                                 max_layers: int,
                                 qp_offsets: List[int]) -> None:
         """
-        Recursively add hierarchical B-frames
+        Add hierarchical B-frames (iterative depth-first traversal)
         
         Args:
-            frames: List to append frames to
+            rows: List to append frame rows to
             start: Start frame index
             end: End frame index
             layer: Current temporal layer
             max_layers: Maximum number of layers
             qp_offsets: QP offsets for each layer
         """
-        if start >= end or layer >= max_layers:
-            return
-        
-        # Middle frame at current layer
-        mid = (start + end) // 2
+        # Explicit stack of (start, end, layer) ranges instead of recursion
+        stack = [(start, end, layer)]
         
-        if mid < end:
+        while stack:
+            start, end, layer = stack.pop()
+            
+            if start >= end or layer >= max_layers:
+                continue
+            
+            # Middle frame at current layer
+            mid = (start + end) // 2
+            
             # Determine if this is a keyframe for detection
             is_keyframe = (mid % self.keyframe_interval == 0)
             
@@ -198,25 +454,15 @@ class GOPManager:
             qp_offset = qp_offsets[min(layer, len(qp_offsets) - 1)]
             
             # Add middle frame
-            frames.append(FrameInfo(
-                index=mid,
-                type=FrameType.B,
-                poc=mid,
-                temporal_layer=layer,
-                qp_offset=qp_offset,
-                ref_frames=[start - 1, end] if start > 0 else [end],
-                is_keyframe=is_keyframe
-            ))
+            refs = (start - 1, end) if start > 0 else (end,)
+            rows.append((mid, _B_FRAME, layer, qp_offset, is_keyframe, refs))
             
-            # Recursively add frames in left and right halves
-            self._add_hierarchical_frames(
-                frames, start, mid, layer + 1, max_layers, qp_offsets
-            )
-            self._add_hierarchical_frames(
-                frames, mid + 1, end, layer + 1, max_layers, qp_offsets
-            )
+            # Push right half first so the left half is visited first
+            # (same coding order as the recursive version)
+            stack.append((mid + 1, end, layer + 1))
+            stack.append((start, mid, layer + 1))
     
-    def _generate_ldp_structure(self, n_frames: int) -> List[FrameInfo]:
+    def _generate_ldp_structure(self, n_frames: int) -> FrameTable:
         """
         Generate Low-Delay P structure
         
@@ -224,37 +470,25 @@ class GOPManager:
             n_frames: Total number of frames
             
         Returns:
-            List of FrameInfo objects
+            FrameTable
         """
-        frames = []
-        
-        for i in range(n_frames):
-            if i % self.intra_period == 0:
-                # I-frame
-                frame = FrameInfo(
-                    index=i,
-                    type=FrameType.I,
-                    poc=i,
-                    temporal_layer=0,
-                    qp_offset=0,
-                    ref_frames=[],
-                    is_keyframe=True
-                )
-            else:
-                # P-frame
-                is_keyframe = (i % self.keyframe_interval == 0)
-                frame = FrameInfo(
-                    index=i,
-                    type=FrameType.P,
-                    poc=i,
-                    temporal_layer=0,
-                    qp_offset=0,
-                    ref_frames=[i - 1],
-                    is_keyframe=is_keyframe
-                )
-            frames.append(frame)
-        
-        return frames
+        idx = np.arange(n_frames, dtype=np.int32)
+        is_i = (idx % self.intra_period) == 0
+        
+        # P-frames reference the previous frame, I-frames nothing
+        ref_ptr = np.zeros(n_frames + 1, dtype=np.int32)
+        np.cumsum(~is_i, out=ref_ptr[1:])
+        
+        return FrameTable(
+            index=idx,
+            type=np.where(is_i, _I_FRAME, _P_FRAME).astype(np.int8),
+            poc=idx,
+            temporal_layer=np.zeros(n_frames, dtype=np.int8),
+            qp_offset=np.zeros(n_frames, dtype=np.int8),
+            is_keyframe=is_i | ((idx % self.keyframe_interval) == 0),
+            ref_ptr=ref_ptr,
+            ref_idx=idx[~is_i] - 1
+        )
     
     def get_keyframe_indices(self, n_frames: int) -> List[int]:
         """
@@ -266,8 +500,8 @@ class GOPManager:
         Returns:
             List of keyframe indices
         """
-        frame_structure = self.generate_frame_structure(n_frames)
-        return [f.index for f in frame_structure if f.is_keyframe]
+        table = self.get_frame_table(n_frames)
+        return table.index[table.is_keyframe].tolist()
     
     def get_gop_boundaries(self, n_frames: int) -> List[Tuple[int, int]]:
         """
@@ -304,13 +538,10 @@ class GOPManager:
         Returns:
             List of reference frame indices
         """
-        frame_structure = self.generate_frame_structure(n_frames)
-        
-        for frame in frame_structure:
-            if frame.index == frame_idx:
-                return frame.ref_frames
+        table = self.get_frame_table(n_frames)
         
-        return []
+        row = table.find(frame_idx)
+        return table.ref_frames(row) if row >= 0 else []
     
     def print_structure(self, n_frames: int) -> None:
         """
@@ -319,7 +550,7 @@ class GOPManager:
         Args:
             n_frames: Total number of frames
         """
-        frames = self.generate_frame_structure(n_frames)
+        table = self.get_frame_table(n_frames)
         
         print(f"\n{'='*80}")
         print(f"GOP Structure: {self.config_type}")
@@ -329,13 +560,14 @@ class GOPManager:
         print(f"{'Index':<8} {'Type':<6} {'POC':<6} {'Layer':<8} {'QP Offset':<10} {'Refs':<15} {'Keyframe'}")
         print(f"{'-'*80}")
         
-        for frame in frames[:min(len(frames), 50)]:  # Show first 50 frames
+        for row in range(min(len(table), 50)):  # Show first 50 frames
+            frame = table.frame(row)
             refs_str = str(frame.ref_frames) if frame.ref_frames else "[]"
             print(f"{frame.index:<8} {frame.type.value:<6} {frame.poc:<6} "
                   f"{frame.temporal_layer:<8} {frame.qp_offset:<10} "
                   f"{refs_str:<15} {'Yes' if frame.is_keyframe else 'No'}")
         
-        if len(frames) > 50:
-            print(f"... ({len(frames) - 50} more frames)")
+        if len(table) > 50:
+            print(f"... ({len(table) - 50} more frames)")
         
         print(f"{'='*80}\n")
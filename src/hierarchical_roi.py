@@ -18,11 +18,152 @@ IMPLEMENTATION:
 - Bitrate normalization to maintain target rate
 """
 
+import math
 import numpy as np
 import cv2
 from typing import List, Tuple, Dict, Optional
 import logging
 
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+
+# BGR overlay color per ROI level (background, context, core)
+_ROI_COLOR_LUT = np.array([[128, 0, 0],
+                           [0, 128, 128],
+                           [0, 128, 0]], dtype=np.uint8)
+
+
+if NUMBA_AVAILABLE:
+    @njit(parallel=True, cache=True, boundscheck=False)
+    def _rasterize_roi_numba(roi_map, ctx_boxes, core_boxes):
+        """
+        Paint context rings then cores into roi_map (in place)
+        
+        Rows are processed in parallel; within a row all context spans are
+        written before any core span, so core always overrides context.
+        
+        Args:
+            roi_map: ROI map (H, W) uint8, all background
+            ctx_boxes: Clipped context boxes (N, 4) int32 [x1, y1, x2, y2]
+            core_boxes: Clipped core boxes (N, 4) int32 [x1, y1, x2, y2]
+        """
+        height = roi_map.shape[0]
+        n_boxes = ctx_boxes.shape[0]
+        for y in prange(height):
+            for b in range(n_boxes):
+                if ctx_boxes[b, 1] <= y < ctx_boxes[b, 3]:
+                    for x in range(ctx_boxes[b, 0], ctx_boxes[b, 2]):
+                        roi_map[y, x] = 1
+            for b in range(n_boxes):
+                if core_boxes[b, 1] <= y < core_boxes[b, 3]:
+                    for x in range(core_boxes[b, 0], core_boxes[b, 2]):
+                        roi_map[y, x] = 2
+
+
+# Packed (2 bits/pixel, 32 pixels per uint64 word) ROI representation
+_PACKED_PIXELS = 32
+_PACKED_CONTEXT_BITS = 0x5555555555555555  # '01' in every 2-bit field
+_PACKED_SHIFTS = np.arange(_PACKED_PIXELS, dtype=np.uint64) * np.uint64(2)
+
+
+def _packed_span_masks(x1: int, x2: int) -> Tuple[int, np.ndarray]:
+    """
+    Build per-word context bit masks ('01' fields) covering columns [x1, x2)
+    
+    Args:
+        x1: First column
+        x2: End column (exclusive)
+        
+    Returns:
+        Tuple of (first word index, uint64 masks for the covered words)
+    """
+    x1, x2 = int(x1), int(x2)
+    w0 = x1 // _PACKED_PIXELS
+    w1 = (x2 - 1) // _PACKED_PIXELS
+    masks = [_PACKED_CONTEXT_BITS] * (w1 - w0 + 1)
+    
+    # Clear fields left of x1 in the first word and right of x2 in the last
+    masks[0] &= ~((1 << (2 * (x1 % _PACKED_PIXELS))) - 1)
+    end_fields = (x2 - 1) % _PACKED_PIXELS + 1
+    masks[-1] &= (1 << (2 * end_fields)) - 1
+    
+    return w0, np.array(masks, dtype=np.uint64)
+
+
+def _rasterize_roi_packed(ctx_boxes: List[Tuple[int, int, int, int]],
+                          core_boxes: List[Tuple[int, int, int, int]],
+                          width: int,
+                          height: int) -> np.ndarray:
+    """
+    Paint context rings then cores into a packed ROI map
+    
+    Context ORs the '01' field pattern into each covered word; core sets
+    '10' and clears '01', so 32 pixels are updated per word operation.
+    
+    Args:
+        ctx_boxes: Clipped context boxes [x1, y1, x2, y2]
+        core_boxes: Clipped core boxes [x1, y1, x2, y2]
+        width: Frame width
+        height: Frame height
+        
+    Returns:
+        Packed ROI map (H, ceil(W / 32)) uint64
+    """
+    n_words = (width + _PACKED_PIXELS - 1) // _PACKED_PIXELS
+    packed = np.zeros((height, n_words), dtype=np.uint64)
+    
+    for x1, y1, x2, y2 in ctx_boxes:
+        w0, ctx_bits = _packed_span_masks(x1, x2)
+        region = packed[y1:y2, w0:w0 + len(ctx_bits)]
+        region |= ctx_bits
+    
+    for x1, y1, x2, y2 in core_boxes:
+        w0, ctx_bits = _packed_span_masks(x1, x2)
+        region = packed[y1:y2, w0:w0 + len(ctx_bits)]
+        region &= ~ctx_bits
+        region |= ctx_bits << np.uint64(1)
+    
+    return packed
+
+
+# Set bits per byte value, for popcounts without np.bitwise_count (NumPy < 2)
+_POPCOUNT8 = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+
+def _popcount64(words: np.ndarray) -> np.ndarray:
+    """
+    Number of set bits of every uint64 word
+    
+    Args:
+        words: uint64 array (H, N)
+        
+    Returns:
+        Bit counts (H, N)
+    """
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(words)
+    by_byte = _POPCOUNT8[words.view(np.uint8)]
+    return by_byte.reshape(*words.shape, 8).sum(axis=-1, dtype=np.uint8)
+
+
+def unpack_roi_map(packed: np.ndarray, width: int) -> np.ndarray:
+    """
+    Expand a packed 2-bit ROI map to one uint8 level per pixel
+    
+    Args:
+        packed: Packed ROI map (H, ceil(W / 32)) uint64
+        width: Frame width
+        
+    Returns:
+        ROI map (H, W) uint8
+    """
+    levels = (packed[:, :, None] >> _PACKED_SHIFTS) & np.uint64(3)
+    return levels.reshape(packed.shape[0], -1)[:, :width].astype(np.uint8)
+
 
 class HierarchicalROI:
     """
@@ -53,6 +194,18 @@ class HierarchicalROI:
         self.max_ring_width = ring_config.get('max_width', 50)
         self.motion_factor = ring_config.get('motion_factor', 0.3)
         
+        # Last motion map and its integral image (see _get_motion_integral)
+        self._last_motion_map = None
+        self._last_motion_integral = None
+        
+        # Unweighted temporal merge: 'majority' or 'max'
+        self.merge_mode = h_config.get('merge_mode', 'majority')
+        if self.merge_mode not in ('majority', 'max'):
+            raise ValueError(f"Unknown merge mode: {self.merge_mode}")
+        
+        # Visualization legend images, keyed by frame width
+        self._legend_cache: Dict[int, np.ndarray] = {}
+        
         self.logger.info(f"Hierarchical ROI initialized:")
         self.logger.info(f"  Levels: {self.n_levels}")
         self.logger.info(f"  Adaptive ring: {self.adaptive_ring}")
@@ -81,77 +234,255 @@ class HierarchicalROI:
         # Initialize ROI map (all background)
         roi_map = np.zeros((height, width), dtype=np.uint8)
         
-        if len(bboxes) == 0:
+        ctx_boxes, core_boxes = self._compute_roi_boxes(
+            bboxes, width, height, motion_map
+        )
+        
+        if not core_boxes:
             return roi_map
         
-        # Process each bbox
-        for bbox in bboxes:
-            x1, y1, x2, y2 = bbox.astype(int)
+        if NUMBA_AVAILABLE:
+            _rasterize_roi_numba(roi_map,
+                                 np.array(ctx_boxes, dtype=np.int32),
+                                 np.array(core_boxes, dtype=np.int32))
+            return roi_map
+        
+        # OpenCV fallback: all context rings first (Level 1), then all
+        # cores (Level 2), so core always overrides context.
+        # cv2.rectangle end points are inclusive.
+        for x1, y1, x2, y2 in ctx_boxes:
+            cv2.rectangle(roi_map, (x1, y1), (x2 - 1, y2 - 1), 1, thickness=-1)
+        for x1, y1, x2, y2 in core_boxes:
+            cv2.rectangle(roi_map, (x1, y1), (x2 - 1, y2 - 1), 2, thickness=-1)
+        
+        return roi_map
+    
+    def generate_packed_roi(self,
+                            bboxes: np.ndarray,
+                            width: int,
+                            height: int,
+                            motion_map: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Generate the hierarchical ROI map in packed 2-bit form
+        
+        Levels are stored as 2-bit fields, 32 pixels per uint64 word (1/8 of
+        the uint8 map). Keep the map packed and convert it with
+        packed_roi_to_ctu_map for the encoder, or unpack_roi_map when a
+        pixel-level map is needed.
+        
+        Args:
+            bboxes: Bounding boxes (N, 4) [x1, y1, x2, y2]
+            width: Frame width
+            height: Frame height
+            motion_map: Optional motion magnitude map for adaptive ring
+            
+        Returns:
+            Packed ROI map (H, ceil(W / 32)) uint64
+        """
+        ctx_boxes, core_boxes = self._compute_roi_boxes(
+            bboxes, width, height, motion_map
+        )
+        return _rasterize_roi_packed(ctx_boxes, core_boxes, width, height)
+    
+    def packed_roi_to_ctu_map(self,
+                              packed: np.ndarray,
+                              width: int,
+                              ctu_size: int = 128) -> np.ndarray:
+        """
+        Convert a packed ROI map to a CTU-level map (same majority vote as
+        roi_map_to_ctu_map)
+        
+        For CTU sizes that are a multiple of 32 pixels, context and core
+        pixels are counted with popcounts on the packed words, without
+        expanding the map.
+        
+        Args:
+            packed: Packed ROI map (H, ceil(W / 32)) uint64
+            width: Frame width
+            ctu_size: CTU size in pixels
             
-            # Clip to frame bounds
-            x1 = max(0, min(x1, width - 1))
-            y1 = max(0, min(y1, height - 1))
-            x2 = max(0, min(x2, width))
-            y2 = max(0, min(y2, height))
+        Returns:
+            CTU-level ROI map (n_ctu_h, n_ctu_w)
+        """
+        if ctu_size % _PACKED_PIXELS:
+            return self.roi_map_to_ctu_map(unpack_roi_map(packed, width), ctu_size)
+        
+        height = packed.shape[0]
+        n_ctu_h = (height + ctu_size - 1) // ctu_size
+        n_ctu_w = (width + ctu_size - 1) // ctu_size
+        words_per_ctu = ctu_size // _PACKED_PIXELS
+        
+        # '01' fields are context, '10' fields are core
+        field_mask = np.uint64(_PACKED_CONTEXT_BITS)
+        per_word = np.stack([_popcount64(packed & field_mask),
+                             _popcount64((packed >> np.uint64(1)) & field_mask)])
+        
+        # Sum per CTU; padding words/rows are zero and count nothing
+        per_word = np.pad(per_word, ((0, 0),
+                                     (0, n_ctu_h * ctu_size - height),
+                                     (0, n_ctu_w * words_per_ctu - packed.shape[1])))
+        ctx_core = per_word.reshape(2, n_ctu_h, ctu_size, n_ctu_w, words_per_ctu).sum(
+            axis=(2, 4), dtype=np.int64
+        )
+        
+        # Background = real pixels of the CTU (edge CTUs are partial) - others
+        rows = np.minimum(ctu_size, height - np.arange(n_ctu_h) * ctu_size)
+        cols = np.minimum(ctu_size, width - np.arange(n_ctu_w) * ctu_size)
+        background = rows[:, None] * cols[None, :] - ctx_core.sum(axis=0)
+        
+        # Majority vote (ties -> lowest level)
+        counts = np.concatenate([background[None], ctx_core])
+        return counts.argmax(axis=0).astype(np.uint8)
+    
+    def generate_ctu_roi(self,
+                         bboxes: np.ndarray,
+                         width: int,
+                         height: int,
+                         motion_map: Optional[np.ndarray] = None,
+                         ctu_size: int = 128) -> np.ndarray:
+        """
+        Generate CTU-level hierarchical ROI map directly from bounding boxes
+        
+        Skips the pixel-level map: a CTU takes the highest level of any
+        core box / context ring overlapping it. Unlike the majority vote of
+        roi_map_to_ctu_map, partially covered CTUs are never demoted.
+        
+        Args:
+            bboxes: Bounding boxes (N, 4) [x1, y1, x2, y2]
+            width: Frame width
+            height: Frame height
+            motion_map: Optional motion magnitude map for adaptive ring
+            ctu_size: CTU size in pixels
             
-            # Skip invalid boxes
-            if x2 <= x1 or y2 <= y1:
-                continue
+        Returns:
+            CTU-level ROI map (n_ctu_h, n_ctu_w) with levels 0, 1, 2
+        """
+        n_ctu_h = (height + ctu_size - 1) // ctu_size
+        n_ctu_w = (width + ctu_size - 1) // ctu_size
+        ctu_map = np.zeros((n_ctu_h, n_ctu_w), dtype=np.uint8)
+        
+        ctx_boxes, core_boxes = self._compute_roi_boxes(
+            bboxes, width, height, motion_map
+        )
+        
+        if not core_boxes:
+            return ctu_map
+        
+        # Pixel spans -> CTU spans (start rounded down, end rounded up)
+        for level, boxes in ((1, ctx_boxes), (2, core_boxes)):
+            spans = np.array(boxes, dtype=np.int64)
+            spans[:, :2] //= ctu_size
+            spans[:, 2:] = -(-spans[:, 2:] // ctu_size)
+            for cx1, cy1, cx2, cy2 in spans.tolist():
+                ctu_map[cy1:cy2, cx1:cx2] = level
+        
+        return ctu_map
+    
+    def _compute_roi_boxes(self,
+                           bboxes: np.ndarray,
+                           width: int,
+                           height: int,
+                           motion_map: Optional[np.ndarray]) -> Tuple[List[Tuple[int, int, int, int]],
+                                                                      List[Tuple[int, int, int, int]]]:
+        """
+        Clip bounding boxes and compute their context ring boxes
+        
+        Args:
+            bboxes: Bounding boxes (N, 4) [x1, y1, x2, y2]
+            width: Frame width
+            height: Frame height
+            motion_map: Optional motion magnitude map for adaptive ring
             
+        Returns:
+            Tuple of (context boxes, core boxes), both clipped to the frame
+        """
+        ctx_boxes = []
+        core_boxes = []
+        
+        if len(bboxes) == 0:
+            return ctx_boxes, core_boxes
+        
+        # Integral image of the motion map: each bbox's mean motion then
+        # costs 4 lookups instead of a full read of the bbox region
+        motion_integral = None
+        if self.adaptive_ring and motion_map is not None:
+            motion_integral = self._get_motion_integral(motion_map)
+        
+        # Clip all boxes to frame bounds at once and drop invalid ones
+        # Convert to int once for the whole batch rather than per bbox
+        bboxes_int = np.asarray(bboxes).astype(int)
+        clipped = bboxes_int.copy()
+        np.clip(clipped[:, 0], 0, width - 1, out=clipped[:, 0])
+        np.clip(clipped[:, 1], 0, height - 1, out=clipped[:, 1])
+        np.clip(clipped[:, 2], 0, width, out=clipped[:, 2])
+        np.clip(clipped[:, 3], 0, height, out=clipped[:, 3])
+        valid = (clipped[:, 2] > clipped[:, 0]) & (clipped[:, 3] > clipped[:, 1])
+        
+        for (x1, y1, x2, y2), bbox in zip(clipped[valid].tolist(),
+                                          bboxes_int[valid].tolist()):
             # Calculate adaptive ring width
             if self.adaptive_ring:
                 ring_width = self._calculate_adaptive_ring_width(
-                    bbox, motion_map, width, height
+                    bbox, motion_integral, width, height
                 )
             else:
                 ring_width = int((x2 - x1 + y2 - y1) / 2 * self.base_ring_ratio)
                 ring_width = np.clip(ring_width, self.min_ring_width, self.max_ring_width)
             
-            # Level 1: Context Ring (draw first, will be overwritten by core)
-            ctx_x1 = max(0, x1 - ring_width)
-            ctx_y1 = max(0, y1 - ring_width)
-            ctx_x2 = min(width, x2 + ring_width)
-            ctx_y2 = min(height, y2 + ring_width)
-            
-            # Only mark as context if not already core
-            roi_map[ctx_y1:ctx_y2, ctx_x1:ctx_x2] = np.where(
-                roi_map[ctx_y1:ctx_y2, ctx_x1:ctx_x2] == 0,
-                1,  # Context
-                roi_map[ctx_y1:ctx_y2, ctx_x1:ctx_x2]
-            )
-            
-            # Level 2: Core (overwrite context)
-            roi_map[y1:y2, x1:x2] = 2
+            ctx_boxes.append((max(0, x1 - ring_width),
+                              max(0, y1 - ring_width),
+                              min(width, x2 + ring_width),
+                              min(height, y2 + ring_width)))
+            core_boxes.append((x1, y1, x2, y2))
         
-        return roi_map
+        return ctx_boxes, core_boxes
+    
+    def _get_motion_integral(self, motion_map: np.ndarray) -> np.ndarray:
+        """
+        Get integral image of a motion map, reusing the last one if the
+        same motion map object is passed again (e.g. several ROI maps for
+        one frame). Motion maps must not be modified in place between calls.
+        
+        Args:
+            motion_map: Motion magnitude map (H, W)
+            
+        Returns:
+            Integral image (H+1, W+1) float64
+        """
+        # Compare by identity; holding the reference keeps the id unique
+        if motion_map is not self._last_motion_map:
+            self._last_motion_integral = cv2.integral(motion_map, sdepth=cv2.CV_64F)
+            self._last_motion_map = motion_map
+        return self._last_motion_integral
     
     def _calculate_adaptive_ring_width(self,
-                                       bbox: np.ndarray,
-                                       motion_map: Optional[np.ndarray],
+                                       bbox: Tuple[int, int, int, int],
+                                       motion_integral: Optional[np.ndarray],
                                        width: int,
                                        height: int) -> int:
         """
         Calculate adaptive context ring width
         
         Args:
-            bbox: Bounding box [x1, y1, x2, y2]
-            motion_map: Motion magnitude map
+            bbox: Integer bounding box (x1, y1, x2, y2)
+            motion_integral: Integral image (H+1, W+1) of the motion
+                             magnitude map (see cv2.integral)
             width: Frame width
             height: Frame height
             
         Returns:
             Ring width in pixels
         """
-        x1, y1, x2, y2 = bbox.astype(int)
+        x1, y1, x2, y2 = bbox
         
         # Base width proportional to object size
         bbox_w = x2 - x1
         bbox_h = y2 - y1
-        bbox_size = np.sqrt(bbox_w * bbox_h)
+        bbox_size = math.sqrt(bbox_w * bbox_h)
         base_width = int(bbox_size * self.base_ring_ratio)
         
         # Adjust based on motion if available
-        if motion_map is not None:
+        if motion_integral is not None:
             # Sample motion in bbox region
             x1_clip = max(0, min(x1, width - 1))
             y1_clip = max(0, min(y1, height - 1))
@@ -159,8 +490,11 @@ class HierarchicalROI:
             y2_clip = max(0, min(y2, height))
             
             if x2_clip > x1_clip and y2_clip > y1_clip:
-                bbox_motion = motion_map[y1_clip:y2_clip, x1_clip:x2_clip]
-                avg_motion = np.mean(bbox_motion)
+                ii = motion_integral
+                motion_sum = (ii[y2_clip, x2_clip] - ii[y1_clip, x2_clip]
+                              - ii[y2_clip, x1_clip] + ii[y1_clip, x1_clip])
+                area = (x2_clip - x1_clip) * (y2_clip - y1_clip)
+                avg_motion = motion_sum / area
                 
                 # Increase ring width for high motion objects
                 motion_adjustment = 1.0 + self.motion_factor * (avg_motion / 10.0)
@@ -186,22 +520,23 @@ class HierarchicalROI:
         n_ctu_h = (height + ctu_size - 1) // ctu_size
         n_ctu_w = (width + ctu_size - 1) // ctu_size
         
-        ctu_map = np.zeros((n_ctu_h, n_ctu_w), dtype=np.uint8)
+        # Pad to a whole number of CTUs with a value outside the level
+        # range, so partial edge CTUs only count their real pixels
+        pad_h = n_ctu_h * ctu_size - height
+        pad_w = n_ctu_w * ctu_size - width
+        if pad_h or pad_w:
+            roi_map = np.pad(roi_map, ((0, pad_h), (0, pad_w)),
+                             mode='constant', constant_values=255)
         
-        for i in range(n_ctu_h):
-            for j in range(n_ctu_w):
-                # Get CTU region
-                y1 = i * ctu_size
-                y2 = min((i + 1) * ctu_size, height)
-                x1 = j * ctu_size
-                x2 = min((j + 1) * ctu_size, width)
-                
-                # Get ROI values in this CTU
-                ctu_roi = roi_map[y1:y2, x1:x2]
-                
-                # Assign CTU level based on majority vote
-                unique, counts = np.unique(ctu_roi, return_counts=True)
-                ctu_map[i, j] = unique[np.argmax(counts)]
+        # Block view (n_ctu_h, ctu_size, n_ctu_w, ctu_size)
+        blocks = roi_map.reshape(n_ctu_h, ctu_size, n_ctu_w, ctu_size)
+        
+        # Per-CTU pixel count of each level
+        counts = np.stack([(blocks == k).sum(axis=(1, 3))
+                           for k in range(self.n_levels)], axis=0)
+        
+        # Assign CTU level based on majority vote (ties -> lowest level)
+        ctu_map = counts.argmax(axis=0).astype(np.uint8)
         
         return ctu_map
     
@@ -220,26 +555,41 @@ class HierarchicalROI:
         Returns:
             Annotated frame
         """
-        vis = frame.copy()
+        height, width = roi_map.shape
+        legend = self._get_legend(width)
+        
+        # Output = blended frame on top of the legend, written in place
+        vis = np.empty((height + legend.shape[0], width, 3), dtype=np.uint8)
         
-        # Create colored overlay
-        overlay = np.zeros_like(frame)
+        # Colored overlay via a single LUT gather:
+        # Background = blue tint, Context = yellow tint, Core = green tint
+        overlay = _ROI_COLOR_LUT[roi_map]
         
-        # Background: Blue tint
-        overlay[roi_map == 0] = [128, 0, 0]
+        # Blend with original frame
+        cv2.addWeighted(frame, 0.7, overlay, 0.3, 0, dst=vis[:height])
+        vis[height:] = legend
         
-        # Context: Yellow tint
-        overlay[roi_map == 1] = [0, 128, 128]
+        if output_path:
+            cv2.imwrite(output_path, vis)
         
-        # Core: Green tint
-        overlay[roi_map == 2] = [0, 128, 0]
+        return vis
+    
+    def _get_legend(self, width: int) -> np.ndarray:
+        """
+        Get ROI level legend image for a frame width (cached per width)
         
-        # Blend with original frame
-        vis = cv2.addWeighted(vis, 0.7, overlay, 0.3, 0)
+        Args:
+            width: Frame width
+            
+        Returns:
+            Legend image (80, width, 3)
+        """
+        legend = self._legend_cache.get(width)
+        if legend is not None:
+            return legend
         
-        # Add legend
         legend_height = 80
-        legend = np.zeros((legend_height, frame.shape[1], 3), dtype=np.uint8)
+        legend = np.zeros((legend_height, width, 3), dtype=np.uint8)
         
         cv2.rectangle(legend, (10, 10), (30, 30), (128, 0, 0), -1)
         cv2.putText(legend, "Background (Level 0)", (40, 25),
@@ -253,13 +603,8 @@ class HierarchicalROI:
         cv2.putText(legend, "Core (Level 2)", (280, 25),
                    cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
         
-        # Combine
-        vis = np.vstack([vis, legend])
-        
-        if output_path:
-            cv2.imwrite(output_path, vis)
-        
-        return vis
+        self._legend_cache[width] = legend
+        return legend
     
     def get_level_statistics(self, roi_map: np.ndarray) -> Dict:
         """
@@ -273,9 +618,12 @@ class HierarchicalROI:
         """
         total_pixels = roi_map.size
         
+        # Pixel count per level in a single linear pass
+        level_counts = np.bincount(roi_map.ravel(), minlength=self.n_levels)
+        
         stats = {}
         for level in range(self.n_levels):
-            n_pixels = np.sum(roi_map == level)
+            n_pixels = level_counts[level]
             percentage = (n_pixels / total_pixels) * 100
             
             level_names = {0: 'background', 1: 'context', 2: 'core'}
@@ -292,6 +640,10 @@ class HierarchicalROI:
         """
         Merge multiple ROI maps with optional temporal weighting
         
+        Without weights, maps are merged according to the configured
+        merge_mode: 'majority' (per-pixel mode, ties go to the lowest
+        level) or 'max' (per-pixel maximum, i.e. union of ROIs).
+        
         Args:
             roi_maps: List of ROI maps
             weights: Optional weights for each map
@@ -305,16 +657,24 @@ class HierarchicalROI:
         if len(roi_maps) == 1:
             return roi_maps[0]
         
-        # Stack maps
-        stacked = np.stack(roi_maps, axis=0)
-        
-        if weights is None:
-            # Simple majority vote
-            merged = np.median(stacked, axis=0).astype(np.uint8)
+        if weights is None and self.merge_mode == 'max':
+            merged = np.maximum.reduce(roi_maps).astype(np.uint8, copy=False)
+        elif weights is None and len(roi_maps) == 2:
+            # Majority of two maps: equal values win, a tie goes to the
+            # lower level, i.e. the per-pixel minimum
+            merged = np.minimum(roi_maps[0], roi_maps[1]).astype(np.uint8, copy=False)
+        elif weights is None:
+            # Majority vote (mode) per pixel, ties go to the lowest level
+            counts = np.zeros((self.n_levels,) + roi_maps[0].shape, dtype=np.uint16)
+            for roi_map in roi_maps:
+                for level in range(self.n_levels):
+                    counts[level] += (roi_map == level)
+            merged = counts.argmax(axis=0).astype(np.uint8)
         else:
-            # Weighted average
-            weights = np.array(weights).reshape(-1, 1, 1)
-            weighted_sum = np.sum(stacked * weights, axis=0)
+            # Weighted average, accumulated map by map (no K x H x W stack)
+            weighted_sum = np.zeros(roi_maps[0].shape, dtype=np.float64)
+            for w, roi_map in zip(weights, roi_maps):
+                weighted_sum += w * roi_map
             merged = np.round(weighted_sum).astype(np.uint8)
         
         return merged
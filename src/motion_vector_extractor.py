@@ -3,14 +3,106 @@ Motion Vector Extractor Module
 Extracts motion vectors from VVC decoder or uses optical flow
 """
 
+import os
 import numpy as np
 import cv2
+from scipy.interpolate import LinearNDInterpolator
+from scipy.spatial import Delaunay
 import subprocess
 import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, Optional, Tuple
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 import logging
 
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+
+if NUMBA_AVAILABLE:
+    @njit(cache=True)
+    def _flow_statistics_numba(flow):
+        """
+        Single pass over flow accumulating magnitude and component sums
+        
+        Args:
+            flow: Optical flow (H, W, 2)
+            
+        Returns:
+            Tuple of (sum_mag, sum_sq_mag, max_mag, sum_dx, sum_dy)
+        """
+        sum_mag = 0.0
+        sum_sq = 0.0
+        max_mag = -np.inf
+        sum_dx = 0.0
+        sum_dy = 0.0
+        for i in range(flow.shape[0]):
+            for j in range(flow.shape[1]):
+                dx = np.float64(flow[i, j, 0])
+                dy = np.float64(flow[i, j, 1])
+                sq = dx * dx + dy * dy
+                mag = np.sqrt(sq)
+                sum_mag += mag
+                sum_sq += sq
+                if mag > max_mag:
+                    max_mag = mag
+                sum_dx += dx
+                sum_dy += dy
+        return sum_mag, sum_sq, max_mag, sum_dx, sum_dy
+    
+    @njit(cache=True)
+    def _barycentric_fill_row(flow, simplex_idx, transform, simplices, values, y):
+        """
+        Barycentric interpolation of one row (see _barycentric_fill_numba)
+        """
+        for x in range(simplex_idx.shape[1]):
+            s = simplex_idx[y, x]
+            if s < 0:
+                continue
+            rx = x - transform[s, 2, 0]
+            ry = y - transform[s, 2, 1]
+            b0 = transform[s, 0, 0] * rx + transform[s, 0, 1] * ry
+            b1 = transform[s, 1, 0] * rx + transform[s, 1, 1] * ry
+            b2 = 1.0 - b0 - b1
+            v0 = simplices[s, 0]
+            v1 = simplices[s, 1]
+            v2 = simplices[s, 2]
+            for c in range(2):
+                flow[y, x, c] = (b0 * values[v0, c] + b1 * values[v1, c]
+                                 + b2 * values[v2, c])
+    
+    @njit(parallel=True, cache=True)
+    def _barycentric_fill_numba(flow, simplex_idx, transform, simplices, values):
+        """
+        Linear interpolation of vertex values over a Delaunay triangulation
+        
+        Pixels outside the convex hull (simplex index -1) are left as is.
+        
+        Args:
+            flow: Output flow (H, W, 2), written in place
+            simplex_idx: Containing simplex per pixel (H, W)
+            transform: Delaunay affine transforms (n_simplices, 3, 2)
+            simplices: Vertex indices per simplex (n_simplices, 3)
+            values: Motion vectors at the vertices (N, 2)
+        """
+        for y in prange(simplex_idx.shape[0]):
+            _barycentric_fill_row(flow, simplex_idx, transform, simplices, values, y)
+    
+    @njit(cache=True)
+    def _barycentric_fill_serial(flow, simplex_idx, transform, simplices, values):
+        """
+        Serial _barycentric_fill_numba for worker threads
+        
+        numba's workqueue threading layer aborts on concurrent parallel
+        launches, and other layers would oversubscribe the thread pools.
+        """
+        for y in range(simplex_idx.shape[0]):
+            _barycentric_fill_row(flow, simplex_idx, transform, simplices, values, y)
+
 
 class MotionVectorExtractor:
     """
@@ -33,6 +125,49 @@ class MotionVectorExtractor:
         self.method = self.mv_config.get('extraction_method', 'optical_flow')
         self.block_size = self.mv_config.get('block_size', 16)
         
+        # Lucas-Kanade densification: bin sparse MVs onto a coarse grid and
+        # resize when enough cells are populated, else triangulate
+        self.lk_grid_cell = self.mv_config.get('lk_grid_cell', 16)
+        self.lk_grid_coverage = self.mv_config.get('lk_grid_coverage', 0.9)
+        
+        # Farneback parameters; box filter by default for throughput,
+        # Gaussian window (OPTFLOW_FARNEBACK_GAUSSIAN) is opt-in
+        fb_config = self.mv_config.get('farneback', {})
+        self.fb_pyr_scale = fb_config.get('pyr_scale', 0.5)
+        self.fb_levels = fb_config.get('levels', 3)
+        self.fb_winsize = fb_config.get('winsize', 15)
+        self.fb_iterations = fb_config.get('iterations', 3)
+        self.fb_poly_n = fb_config.get('poly_n', 5)
+        self.fb_poly_sigma = fb_config.get('poly_sigma', 1.2)
+        self.fb_flags = cv2.OPTFLOW_FARNEBACK_GAUSSIAN if fb_config.get('gaussian', False) else 0
+        
+        # CUDA Farneback (used when OpenCV is built with CUDA and a device
+        # is present); created lazily on first use
+        self.use_cuda = self.mv_config.get('use_cuda', True) and self._cuda_available()
+        self._cuda_flow = None
+        self._gpu_frames = None
+        
+        # Farneback warm start: seed a pair with the previous pair's flow
+        # when it continues that pair (its frame1 is the last frame2) and
+        # no scene change (mean abs difference above threshold) occurred
+        self.warm_start = self.mv_config.get('farneback_warm_start', True)
+        self.warm_start_iterations = self.mv_config.get('warm_start_iterations', 2)
+        self.scene_change_threshold = self.mv_config.get('scene_change_threshold', 40.0)
+        self._prev_flow = None
+        
+        # (frame, grayscale) of the last converted frame: in sequence
+        # processing frame2 of one pair is frame1 of the next
+        self._last_gray = None
+        
+        # Lucas-Kanade densification caches: pixel grid per frame shape and
+        # the last (points, triangulation) pair
+        self._grid_cache = {}
+        self._last_tri = None
+        
+        # visualize_flow work buffers (hsv, magnitude, angle), sized to the
+        # last visualized flow
+        self._vis_buffers = None
+        
         self.logger.info(f"Motion Vector Extractor initialized: method={self.method}")
     
     def extract_from_frames(self,
@@ -51,27 +186,57 @@ class MotionVectorExtractor:
             Motion vectors (H, W, 2) - [dx, dy] for each pixel
         """
         # Convert to grayscale if needed
-        if len(frame1.shape) == 3:
-            gray1 = cv2.cvtColor(frame1, cv2.COLOR_BGR2GRAY)
-        else:
-            gray1 = frame1
+        gray1 = self._to_gray(frame1)
+        gray2 = self._to_gray(frame2)
         
-        if len(frame2.shape) == 3:
-            gray2 = cv2.cvtColor(frame2, cv2.COLOR_BGR2GRAY)
-        else:
-            gray2 = frame2
+        return self.extract_from_gray(gray1, gray2, method)
+    
+    def _to_gray(self, frame: np.ndarray) -> np.ndarray:
+        """
+        Convert a BGR frame to grayscale, reusing the last conversion
         
-        if method == 'farneback':
-            flow = cv2.calcOpticalFlowFarneback(
-                gray1, gray2, None,
-                pyr_scale=0.5,
-                levels=3,
-                winsize=15,
-                iterations=3,
-                poly_n=5,
-                poly_sigma=1.2,
-                flags=0
-            )
+        The cache is keyed on the frame object itself, so a frame
+        modified in place between calls is not re-converted.
+        
+        Args:
+            frame: Frame (H, W, 3) or (H, W)
+            
+        Returns:
+            Grayscale frame (H, W)
+        """
+        if len(frame.shape) != 3:
+            return frame
+        
+        last = self._last_gray
+        if last is not None and last[0] is frame:
+            return last[1]
+        
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        self._last_gray = (frame, gray)
+        return gray
+    
+    def extract_from_gray(self,
+                          gray1: np.ndarray,
+                          gray2: np.ndarray,
+                          method: str = 'farneback',
+                          warm_start: bool = True) -> np.ndarray:
+        """
+        Extract motion vectors from grayscale frames
+        
+        Args:
+            gray1: Previous grayscale frame (H, W)
+            gray2: Current grayscale frame (H, W)
+            method: Optical flow method ('farneback', 'lucas_kanade')
+            warm_start: Allow seeding Farneback with the previous pair's
+                        flow (disable for out-of-order callers)
+            
+        Returns:
+            Motion vectors (H, W, 2) - [dx, dy] for each pixel
+        """
+        if method == 'farneback' and self.use_cuda:
+            flow = self._farneback_cuda(gray1, gray2)
+        elif method == 'farneback':
+            flow = self._farneback(gray1, gray2, warm_start and self.warm_start)
         elif method == 'lucas_kanade':
             # Sparse optical flow (Lucas-Kanade)
             # Detect features in first frame
@@ -99,6 +264,168 @@ class MotionVectorExtractor:
         
         return flow
     
+    def extract_from_frames_stream(self,
+                                   frames: Iterable[np.ndarray],
+                                   method: str = 'farneback') -> Iterator[np.ndarray]:
+        """
+        Extract motion vectors for consecutive frame pairs of a sequence
+        
+        Flow for the next pair is computed on a background thread while the
+        caller consumes the current one (OpenCV releases the GIL).
+        
+        Args:
+            frames: Iterable of frames (H, W, 3) or (H, W)
+            method: Optical flow method ('farneback', 'lucas_kanade')
+            
+        Yields:
+            Motion vectors (H, W, 2) for pairs (0, 1), (1, 2), ... in order
+        """
+        frames = iter(frames)
+        prev = next(frames, None)
+        if prev is None:
+            return
+        
+        # Each frame is converted once here; the worker runs the grayscale
+        # hot path directly
+        prev_gray = self._to_gray(prev)
+        
+        # Single worker: pairs are computed in order, one ahead of the caller
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            pending = None
+            for frame in frames:
+                gray = self._to_gray(frame)
+                future = executor.submit(self.extract_from_gray, prev_gray, gray, method)
+                if pending is not None:
+                    yield pending.result()
+                pending = future
+                prev_gray = gray
+            
+            if pending is not None:
+                yield pending.result()
+    
+    def extract_from_sequence(self,
+                              frames: List[np.ndarray],
+                              method: str = 'farneback',
+                              n_jobs: int = -1) -> List[np.ndarray]:
+        """
+        Extract motion vectors for all consecutive frame pairs in parallel
+        
+        Args:
+            frames: List of frames (H, W, 3) or (H, W)
+            method: Optical flow method ('farneback', 'lucas_kanade')
+            n_jobs: Number of worker threads (-1: one per CPU core)
+            
+        Returns:
+            List of motion vectors (H, W, 2), one per pair (i, i+1)
+        """
+        # Convert each frame to grayscale once (not once per pair)
+        grays = [
+            cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if len(frame.shape) == 3 else frame
+            for frame in frames
+        ]
+        pairs = range(len(grays) - 1)
+        
+        if n_jobs < 0:
+            n_jobs = os.cpu_count() or 1
+        
+        # Pairs are computed independently (no Farneback warm start), so the
+        # flows do not depend on n_jobs. The GPU path shares device buffers,
+        # so it stays sequential
+        if n_jobs == 1 or self.use_cuda:
+            return [self.extract_from_gray(grays[i], grays[i + 1], method, warm_start=False)
+                    for i in pairs]
+        
+        # OpenCV releases the GIL; numba kernels run serially on the workers
+        # (see _sparse_to_dense_flow)
+        with ThreadPoolExecutor(max_workers=n_jobs) as executor:
+            return list(executor.map(
+                lambda i: self.extract_from_gray(grays[i], grays[i + 1], method,
+                                                 warm_start=False),
+                pairs
+            ))
+    
+    def _farneback(self, gray1: np.ndarray, gray2: np.ndarray, warm_start: bool) -> np.ndarray:
+        """
+        Farneback optical flow on the CPU
+        
+        Args:
+            gray1: Previous grayscale frame (H, W)
+            gray2: Current grayscale frame (H, W)
+            warm_start: Seed with the previous pair's flow if this pair
+                        continues it
+            
+        Returns:
+            Motion vectors (H, W, 2)
+        """
+        prev = self._prev_flow
+        if (warm_start and prev is not None and prev[0] is gray1
+                and cv2.norm(gray1, gray2, cv2.NORM_L1) <= self.scene_change_threshold * gray1.size):
+            flow = cv2.calcOpticalFlowFarneback(
+                gray1, gray2, prev[1].copy(),
+                pyr_scale=self.fb_pyr_scale,
+                levels=self.fb_levels,
+                winsize=self.fb_winsize,
+                iterations=self.warm_start_iterations,
+                poly_n=self.fb_poly_n,
+                poly_sigma=self.fb_poly_sigma,
+                flags=self.fb_flags | cv2.OPTFLOW_USE_INITIAL_FLOW
+            )
+        else:
+            flow = cv2.calcOpticalFlowFarneback(
+                gray1, gray2, None,
+                pyr_scale=self.fb_pyr_scale,
+                levels=self.fb_levels,
+                winsize=self.fb_winsize,
+                iterations=self.fb_iterations,
+                poly_n=self.fb_poly_n,
+                poly_sigma=self.fb_poly_sigma,
+                flags=self.fb_flags
+            )
+        
+        self._prev_flow = (gray2, flow) if warm_start else None
+        
+        return flow
+    
+    @staticmethod
+    def _cuda_available() -> bool:
+        """Check whether OpenCV has CUDA support and a usable device"""
+        try:
+            return cv2.cuda.getCudaEnabledDeviceCount() > 0
+        except (AttributeError, cv2.error):
+            return False
+    
+    def _farneback_cuda(self, gray1: np.ndarray, gray2: np.ndarray) -> np.ndarray:
+        """
+        Farneback optical flow on the GPU
+        
+        Args:
+            gray1: Previous grayscale frame (H, W)
+            gray2: Current grayscale frame (H, W)
+            
+        Returns:
+            Motion vectors (H, W, 2)
+        """
+        if self._cuda_flow is None:
+            self._cuda_flow = cv2.cuda_FarnebackOpticalFlow.create(
+                numLevels=self.fb_levels,
+                pyrScale=self.fb_pyr_scale,
+                fastPyramids=False,
+                winSize=self.fb_winsize,
+                numIters=self.fb_iterations,
+                polyN=self.fb_poly_n,
+                polySigma=self.fb_poly_sigma,
+                flags=self.fb_flags
+            )
+            # Device buffers are reused across calls
+            self._gpu_frames = (cv2.cuda_GpuMat(), cv2.cuda_GpuMat(), cv2.cuda_GpuMat())
+        
+        g1, g2, g_flow = self._gpu_frames
+        g1.upload(gray1)
+        g2.upload(gray2)
+        g_flow = self._cuda_flow.calc(g1, g2, g_flow)
+        
+        return g_flow.download()
+    
     def _sparse_to_dense_flow(self,
                               corners: np.ndarray,
                               next_corners: np.ndarray,
@@ -129,20 +456,98 @@ class MotionVectorExtractor:
         # Calculate motion vectors
         motion = good_new - good_old
         
-        # Interpolate to dense grid
-        from scipy.interpolate import griddata
-        
         points = good_old.reshape(-1, 2)
-        values_x = motion[:, 0]
-        values_y = motion[:, 1]
         
-        grid_x, grid_y = np.meshgrid(np.arange(w), np.arange(h))
+        # Fast path: points tile the frame well enough for a coarse grid
+        grid_flow = self._grid_to_dense_flow(points, motion.reshape(-1, 2), h, w)
+        if grid_flow is not None:
+            return grid_flow
         
-        flow[:, :, 0] = griddata(points, values_x, (grid_x, grid_y), method='linear', fill_value=0)
-        flow[:, :, 1] = griddata(points, values_y, (grid_x, grid_y), method='linear', fill_value=0)
+        # Interpolate to dense grid
+        # Triangulate once and interpolate both components (dx, dy)
+        # together instead of re-triangulating per component. On static
+        # backgrounds the corner set often repeats, so reuse the last one.
+        last = self._last_tri
+        if last is not None and np.array_equal(last[0], points):
+            tri = last[1]
+        else:
+            tri = Delaunay(points)
+            self._last_tri = (points.copy(), tri)
+        
+        xi = self._grid_cache.get((h, w))
+        if xi is None:
+            grid_x, grid_y = np.meshgrid(np.arange(w), np.arange(h))
+            xi = np.stack([grid_x.ravel(), grid_y.ravel()], axis=1).astype(np.float64)
+            self._grid_cache[(h, w)] = xi
+        
+        if NUMBA_AVAILABLE:
+            # Bulk point location in scipy, barycentric fill in numba
+            simplex_idx = tri.find_simplex(xi).reshape(h, w)
+            # Parallel kernel only outside the extraction thread pools
+            if threading.current_thread() is threading.main_thread():
+                fill = _barycentric_fill_numba
+            else:
+                fill = _barycentric_fill_serial
+            fill(flow, simplex_idx, tri.transform, tri.simplices,
+                 motion.reshape(-1, 2).astype(np.float64))
+        else:
+            interp = LinearNDInterpolator(tri, motion.reshape(-1, 2), fill_value=0)
+            flow[:] = interp(xi).reshape(h, w, 2)
         
         return flow
     
+    def _grid_to_dense_flow(self,
+                            points: np.ndarray,
+                            motion: np.ndarray,
+                            h: int,
+                            w: int) -> Optional[np.ndarray]:
+        """
+        Densify sparse motion by cell averaging and bilinear resize
+        
+        Args:
+            points: Point positions (N, 2) [x, y]
+            motion: Motion vectors at points (N, 2) [dx, dy]
+            h: Frame height
+            w: Frame width
+            
+        Returns:
+            Dense flow field (H, W, 2), or None if too few cells are
+            populated for the grid to be representative
+        """
+        cell = self.lk_grid_cell
+        n_cells_h = (h + cell - 1) // cell
+        n_cells_w = (w + cell - 1) // cell
+        n_cells = n_cells_h * n_cells_w
+        
+        cx = np.clip(points[:, 0].astype(int) // cell, 0, n_cells_w - 1)
+        cy = np.clip(points[:, 1].astype(int) // cell, 0, n_cells_h - 1)
+        cell_idx = cy * n_cells_w + cx
+        
+        counts = np.bincount(cell_idx, minlength=n_cells)
+        if np.count_nonzero(counts) < self.lk_grid_coverage * n_cells:
+            return None
+        
+        # Per-cell sums, then fill isolated empty cells from their
+        # neighbours (normalized 3x3 box filter)
+        coarse = np.empty((n_cells_h, n_cells_w, 2), dtype=np.float32)
+        coarse[..., 0] = np.bincount(cell_idx, motion[:, 0], n_cells).reshape(n_cells_h, n_cells_w)
+        coarse[..., 1] = np.bincount(cell_idx, motion[:, 1], n_cells).reshape(n_cells_h, n_cells_w)
+        weight = counts.reshape(n_cells_h, n_cells_w).astype(np.float32)
+        
+        empty = weight == 0
+        if empty.any():
+            coarse_sum = cv2.boxFilter(coarse, -1, (3, 3), normalize=False,
+                                       borderType=cv2.BORDER_CONSTANT)
+            weight_sum = cv2.boxFilter(weight, -1, (3, 3), normalize=False,
+                                       borderType=cv2.BORDER_CONSTANT)
+            coarse[~empty] /= weight[~empty, None]
+            fillable = empty & (weight_sum > 0)
+            coarse[fillable] = coarse_sum[fillable] / weight_sum[fillable, None]
+        else:
+            coarse /= weight[..., None]
+        
+        return cv2.resize(coarse, (w, h), interpolation=cv2.INTER_LINEAR)
+    
     def extract_from_bitstream(self,
                                bitstream_path: str,
                                output_dir: Optional[str] = None) -> Dict[int, np.ndarray]:
@@ -193,22 +598,16 @@ class MotionVectorExtractor:
         n_blocks_h = h // block_size
         n_blocks_w = w // block_size
         
-        block_mvs = np.zeros((n_blocks_h, n_blocks_w, 2), dtype=np.float32)
+        # Crop to whole blocks and gather each block's pixels into one
+        # axis so a single median call covers every block
+        blocks = flow[:n_blocks_h * block_size, :n_blocks_w * block_size]
+        blocks = blocks.reshape(n_blocks_h, block_size, n_blocks_w, block_size, 2)
+        blocks = blocks.transpose(0, 2, 1, 3, 4).reshape(
+            n_blocks_h, n_blocks_w, block_size * block_size, 2
+        )
         
-        for i in range(n_blocks_h):
-            for j in range(n_blocks_w):
-                # Extract block
-                y1 = i * block_size
-                y2 = (i + 1) * block_size
-                x1 = j * block_size
-                x2 = (j + 1) * block_size
-                
-                block_flow = flow[y1:y2, x1:x2]
-                
-                # Calculate median motion vector for block
-                block_mvs[i, j] = np.median(
-                    block_flow.reshape(-1, 2), axis=0
-                )
+        # Median motion vector per block
+        block_mvs = np.median(blocks, axis=2).astype(np.float32)
         
         return block_mvs
     
@@ -233,16 +632,14 @@ class MotionVectorExtractor:
         h, w = target_shape
         flow = np.zeros((h, w, 2), dtype=np.float32)
         
-        n_blocks_h, n_blocks_w = block_mvs.shape[:2]
+        # Replicate each block MV over its block_size x block_size area
+        upsampled = np.repeat(np.repeat(block_mvs, block_size, axis=0), block_size, axis=1)
         
-        for i in range(n_blocks_h):
-            for j in range(n_blocks_w):
-                y1 = i * block_size
-                y2 = min((i + 1) * block_size, h)
-                x1 = j * block_size
-                x2 = min((j + 1) * block_size, w)
-                
-                flow[y1:y2, x1:x2] = block_mvs[i, j]
+        # Blocks beyond the target are cropped; pixels not covered by any
+        # block (partial border blocks) stay zero
+        up_h = min(h, upsampled.shape[0])
+        up_w = min(w, upsampled.shape[1])
+        flow[:up_h, :up_w] = upsampled[:up_h, :up_w]
         
         return flow
     
@@ -261,13 +658,23 @@ class MotionVectorExtractor:
         """
         h, w = flow.shape[:2]
         
+        # Reuse work buffers while the frame size is unchanged
+        if self._vis_buffers is None or self._vis_buffers[0].shape[:2] != (h, w):
+            hsv = np.empty((h, w, 3), dtype=np.uint8)
+            hsv[..., 1] = 255  # Saturation: full
+            self._vis_buffers = (hsv,
+                                 np.empty((h, w), dtype=np.float32),
+                                 np.empty((h, w), dtype=np.float32))
+        hsv, mag, ang = self._vis_buffers
+        
         # Convert flow to HSV
-        mag, ang = cv2.cartToPolar(flow[..., 0], flow[..., 1])
+        mag, ang = cv2.cartToPolar(flow[..., 0], flow[..., 1], magnitude=mag, angle=ang)
         
-        hsv = np.zeros((h, w, 3), dtype=np.uint8)
-        hsv[..., 0] = ang * 180 / np.pi / 2  # Hue: direction
-        hsv[..., 1] = 255  # Saturation: full
-        hsv[..., 2] = cv2.normalize(mag, None, 0, 255, cv2.NORM_MINMAX)  # Value: magnitude
+        np.multiply(ang, 180, out=ang)
+        np.divide(ang, np.pi, out=ang)
+        np.divide(ang, 2, out=ang)
+        hsv[..., 0] = ang  # Hue: direction
+        hsv[..., 2] = cv2.normalize(mag, mag, 0, 255, cv2.NORM_MINMAX)  # Value: magnitude
         
         # Convert to BGR
         flow_vis = cv2.cvtColor(hsv, cv2.COLOR_HSV2BGR)
@@ -278,24 +685,64 @@ class MotionVectorExtractor:
         
         return flow_vis
     
-    def calculate_motion_statistics(self, flow: np.ndarray) -> Dict:
+    def calculate_motion_statistics(self,
+                                    flow: np.ndarray,
+                                    include_median: bool = True) -> Dict:
         """
         Calculate motion statistics from optical flow
         
         Args:
             flow: Optical flow (H, W, 2)
+            include_median: Also compute the median magnitude (needs the
+                            full magnitude array, the only non-streaming
+                            statistic)
             
         Returns:
             Dictionary with motion statistics
         """
+        if NUMBA_AVAILABLE:
+            # Fused single pass: mean/max/std of magnitude and mean dx/dy
+            n = flow.shape[0] * flow.shape[1]
+            sum_mag, sum_sq, max_mag, sum_dx, sum_dy = _flow_statistics_numba(flow)
+            mean_mag = sum_mag / n
+            stats = {
+                'mean_magnitude': mean_mag,
+                'max_magnitude': max_mag,
+                'std_magnitude': np.sqrt(max(sum_sq / n - mean_mag * mean_mag, 0.0)),
+                'mean_dx': sum_dx / n,
+                'mean_dy': sum_dy / n,
+            }
+            if include_median:
+                stats['median_magnitude'] = np.median(self._flow_magnitude(flow))
+            return stats
+        
         # Calculate magnitude
-        magnitude = np.sqrt(flow[..., 0]**2 + flow[..., 1]**2)
+        magnitude = self._flow_magnitude(flow)
         
-        return {
+        stats = {
             'mean_magnitude': np.mean(magnitude),
             'max_magnitude': np.max(magnitude),
             'std_magnitude': np.std(magnitude),
-            'median_magnitude': np.median(magnitude),
             'mean_dx': np.mean(flow[..., 0]),
             'mean_dy': np.mean(flow[..., 1]),
         }
+        if include_median:
+            stats['median_magnitude'] = np.median(magnitude)
+        
+        return stats
+    
+    @staticmethod
+    def _flow_magnitude(flow: np.ndarray) -> np.ndarray:
+        """
+        Per-pixel motion magnitude sqrt(dx^2 + dy^2) in one fused pass
+        
+        Args:
+            flow: Optical flow (H, W, 2)
+            
+        Returns:
+            Magnitude map (H, W)
+        """
+        # cv2.magnitude needs contiguous single-channel planes
+        dx = np.ascontiguousarray(flow[..., 0])
+        dy = np.ascontiguousarray(flow[..., 1])
+        return cv2.magnitude(dx, dy)
@@ -36,6 +36,10 @@ class PerformanceEvaluator:
             logger: Logger instance
         """
         self.logger = logger or logging.getLogger(__name__)
+        
+        # Anchor RD curves (x_min, x_max, PCHIP) keyed on anchor identity and
+        # columns, so sweeps against one baseline fit its curves only once
+        self._curve_cache: Dict[Tuple, Tuple[float, float, interpolate.PchipInterpolator]] = {}
     
     def calculate_bd_rate(self,
                          anchor_data: pd.DataFrame,
@@ -58,48 +62,49 @@ class PerformanceEvaluator:
             BD-Rate in percentage
         """
         # Extract rate and PSNR
-        anchor_rate = anchor_data[rate_col].values
-        anchor_psnr = anchor_data[psnr_col].values
-        test_rate = test_data[rate_col].values
-        test_psnr = test_data[psnr_col].values
+        anchor_rate = anchor_data[rate_col].to_numpy()
+        anchor_psnr = anchor_data[psnr_col].to_numpy()
+        test_rate = test_data[rate_col].to_numpy()
+        test_psnr = test_data[psnr_col].to_numpy()
         
         # Sort by PSNR
         anchor_idx = np.argsort(anchor_psnr)
         test_idx = np.argsort(test_psnr)
         
-        anchor_rate = anchor_rate[anchor_idx]
-        anchor_psnr = anchor_psnr[anchor_idx]
-        test_rate = test_rate[test_idx]
-        test_psnr = test_psnr[test_idx]
-        
-        # Find common PSNR range
-        min_psnr = max(anchor_psnr.min(), test_psnr.min())
-        max_psnr = min(anchor_psnr.max(), test_psnr.max())
-        
-        if min_psnr >= max_psnr:
-            self.logger.warning("No overlapping PSNR range")
-            return 0.0
+        return self._bd_rate_sorted(anchor_psnr[anchor_idx], anchor_rate[anchor_idx],
+                                    test_psnr[test_idx], test_rate[test_idx])
+    
+    def _bd_rate_sorted(self,
+                        anchor_psnr: np.ndarray,
+                        anchor_rate: np.ndarray,
+                        test_psnr: np.ndarray,
+                        test_rate: np.ndarray,
+                        anchor_key: Optional[Tuple] = None) -> float:
+        """
+        BD-Rate from rate/PSNR arrays already sorted by PSNR
         
+        Args:
+            anchor_psnr: Anchor PSNR (ascending)
+            anchor_rate: Anchor bitrate
+            test_psnr: Test PSNR (ascending)
+            test_rate: Test bitrate
+            anchor_key: Optional cache key for the anchor curve
+            
+        Returns:
+            BD-Rate in percentage
+        """
         # Interpolate in log domain (Bjøntegaard method)
         try:
-            # Anchor curve
-            anchor_interp = interpolate.PchipInterpolator(
-                anchor_psnr, np.log(anchor_rate)
-            )
-            
-            # Test curve
-            test_interp = interpolate.PchipInterpolator(
-                test_psnr, np.log(test_rate)
-            )
+            anchor_curve = self._build_curve(anchor_psnr, anchor_rate, log_y=True,
+                                             cache_key=anchor_key)
+            test_curve = self._build_curve(test_psnr, test_rate, log_y=True)
+            avg_diff = self._bd_from_curves(anchor_curve, test_curve)
             
-            # Integrate over common range
-            psnr_range = np.linspace(min_psnr, max_psnr, 1000)
-            
-            anchor_integral = np.trapz(anchor_interp(psnr_range), psnr_range)
-            test_integral = np.trapz(test_interp(psnr_range), psnr_range)
+            if avg_diff is None:
+                self.logger.warning("No overlapping PSNR range")
+                return 0.0
             
             # BD-Rate calculation
-            avg_diff = (test_integral - anchor_integral) / (max_psnr - min_psnr)
             bd_rate = (np.exp(avg_diff) - 1.0) * 100.0
             
             return float(bd_rate)
@@ -129,50 +134,46 @@ class PerformanceEvaluator:
             BD-PSNR in dB
         """
         # Extract rate and PSNR
-        anchor_rate = anchor_data[rate_col].values
-        anchor_psnr = anchor_data[psnr_col].values
-        test_rate = test_data[rate_col].values
-        test_psnr = test_data[psnr_col].values
+        anchor_rate = anchor_data[rate_col].to_numpy()
+        anchor_psnr = anchor_data[psnr_col].to_numpy()
+        test_rate = test_data[rate_col].to_numpy()
+        test_psnr = test_data[psnr_col].to_numpy()
         
         # Sort by rate
         anchor_idx = np.argsort(anchor_rate)
         test_idx = np.argsort(test_rate)
         
-        anchor_rate = anchor_rate[anchor_idx]
-        anchor_psnr = anchor_psnr[anchor_idx]
-        test_rate = test_rate[test_idx]
-        test_psnr = test_psnr[test_idx]
-        
-        # Find common rate range (in log domain)
-        log_anchor_rate = np.log(anchor_rate)
-        log_test_rate = np.log(test_rate)
-        
-        min_log_rate = max(log_anchor_rate.min(), log_test_rate.min())
-        max_log_rate = min(log_anchor_rate.max(), log_test_rate.max())
-        
-        if min_log_rate >= max_log_rate:
-            self.logger.warning("No overlapping rate range")
-            return 0.0
+        return self._bd_psnr_sorted(np.log(anchor_rate[anchor_idx]), anchor_psnr[anchor_idx],
+                                    np.log(test_rate[test_idx]), test_psnr[test_idx])
+    
+    def _bd_psnr_sorted(self,
+                        log_anchor_rate: np.ndarray,
+                        anchor_psnr: np.ndarray,
+                        log_test_rate: np.ndarray,
+                        test_psnr: np.ndarray,
+                        anchor_key: Optional[Tuple] = None) -> float:
+        """
+        BD-PSNR from log-rate/PSNR arrays already sorted by rate
         
-        try:
-            # Anchor curve
-            anchor_interp = interpolate.PchipInterpolator(
-                log_anchor_rate, anchor_psnr
-            )
-            
-            # Test curve
-            test_interp = interpolate.PchipInterpolator(
-                log_test_rate, test_psnr
-            )
-            
-            # Integrate over common range
-            log_rate_range = np.linspace(min_log_rate, max_log_rate, 1000)
+        Args:
+            log_anchor_rate: Anchor log bitrate (ascending)
+            anchor_psnr: Anchor PSNR (or other quality metric)
+            log_test_rate: Test log bitrate (ascending)
+            test_psnr: Test PSNR (or other quality metric)
+            anchor_key: Optional cache key for the anchor curve
             
-            anchor_integral = np.trapz(anchor_interp(log_rate_range), log_rate_range)
-            test_integral = np.trapz(test_interp(log_rate_range), log_rate_range)
+        Returns:
+            BD-PSNR in dB
+        """
+        try:
+            anchor_curve = self._build_curve(log_anchor_rate, anchor_psnr,
+                                             cache_key=anchor_key)
+            test_curve = self._build_curve(log_test_rate, test_psnr)
+            bd_psnr = self._bd_from_curves(anchor_curve, test_curve)
             
-            # BD-PSNR calculation
-            bd_psnr = (test_integral - anchor_integral) / (max_log_rate - min_log_rate)
+            if bd_psnr is None:
+                self.logger.warning("No overlapping rate range")
+                return 0.0
             
             return float(bd_psnr)
         
@@ -180,6 +181,66 @@ class PerformanceEvaluator:
             self.logger.error(f"BD-PSNR calculation failed: {e}")
             return 0.0
     
+    def _build_curve(self,
+                     x: np.ndarray,
+                     y: np.ndarray,
+                     log_y: bool = False,
+                     cache_key: Optional[Tuple] = None) -> Tuple[float, float, interpolate.PchipInterpolator]:
+        """
+        Fit a PCHIP RD curve, reusing a cached fit when a key is given
+        
+        Args:
+            x: Abscissae (ascending)
+            y: Ordinates
+            log_y: Fit log(y) instead of y
+            cache_key: Optional cache key identifying (data, columns)
+            
+        Returns:
+            Tuple of (x_min, x_max, interpolator)
+        """
+        if cache_key is not None:
+            curve = self._curve_cache.get(cache_key)
+            if curve is not None:
+                return curve
+        
+        curve = (x[0], x[-1],
+                 interpolate.PchipInterpolator(x, np.log(y) if log_y else y))
+        
+        if cache_key is not None:
+            self._curve_cache[cache_key] = curve
+        
+        return curve
+    
+    def _bd_from_curves(self,
+                        anchor_curve: Tuple[float, float, interpolate.PchipInterpolator],
+                        test_curve: Tuple[float, float, interpolate.PchipInterpolator]) -> Optional[float]:
+        """
+        Average vertical gap between two PCHIP curves over their common range
+        
+        Args:
+            anchor_curve: Anchor curve from _build_curve
+            test_curve: Test curve from _build_curve
+            
+        Returns:
+            Mean of (test - anchor) over the common x range, or None if
+            the curves do not overlap
+        """
+        anchor_min, anchor_max, anchor_interp = anchor_curve
+        test_min, test_max, test_interp = test_curve
+        
+        # Find common range
+        min_x = max(anchor_min, test_min)
+        max_x = min(anchor_max, test_max)
+        
+        if min_x >= max_x:
+            return None
+        
+        # Integrate over common range (exact, piecewise-cubic antiderivative)
+        anchor_integral = anchor_interp.integrate(min_x, max_x)
+        test_integral = test_interp.integrate(min_x, max_x)
+        
+        return (test_integral - anchor_integral) / (max_x - min_x)
+    
     def calculate_bd_mota(self,
                          anchor_data: pd.DataFrame,
                          test_data: pd.DataFrame,
@@ -250,27 +311,53 @@ class PerformanceEvaluator:
             Dictionary with all comparison metrics
         """
         # Load data
-        baseline = pd.read_csv(baseline_csv)
-        test = pd.read_csv(test_csv)
+        baseline = self._read_results(baseline_csv)
+        test = self._read_results(test_csv)
+        
+        # Baseline curves are cached per file version: a sweep compares
+        # many tests against the same baseline
+        baseline_stat = Path(baseline_csv).stat()
+        baseline_id = (str(Path(baseline_csv).resolve()),
+                       baseline_stat.st_mtime_ns, baseline_stat.st_size)
+        
+        # Sort by bitrate once; every BD-PSNR variant shares the log rates
+        baseline_sorted = baseline.sort_values(by='bitrate')
+        test_sorted = test.sort_values(by='bitrate')
+        log_baseline_rate = np.log(baseline_sorted['bitrate'].to_numpy())
+        log_test_rate = np.log(test_sorted['bitrate'].to_numpy())
+        
+        def bd_psnr(col: str) -> float:
+            return self._bd_psnr_sorted(log_baseline_rate, baseline_sorted[col].to_numpy(),
+                                        log_test_rate, test_sorted[col].to_numpy(),
+                                        anchor_key=(baseline_id, 'bitrate', col))
+        
+        def bd_rate() -> float:
+            baseline_by_psnr = baseline.sort_values(by='psnr_y')
+            test_by_psnr = test.sort_values(by='psnr_y')
+            return self._bd_rate_sorted(baseline_by_psnr['psnr_y'].to_numpy(),
+                                        baseline_by_psnr['bitrate'].to_numpy(),
+                                        test_by_psnr['psnr_y'].to_numpy(),
+                                        test_by_psnr['bitrate'].to_numpy(),
+                                        anchor_key=(baseline_id, 'psnr_y', 'bitrate'))
         
         # Calculate metrics
         results = {
             'experiment': experiment_name,
-            'bd_rate': self.calculate_bd_rate(baseline, test),
-            'bd_psnr_y': self.calculate_bd_psnr(baseline, test, psnr_col='psnr_y'),
+            'bd_rate': bd_rate(),
+            'bd_psnr_y': bd_psnr('psnr_y'),
             'encoding_time_saving': self.calculate_encoding_time_saving(baseline, test),
         }
         
         # Calculate BD-PSNR for U and V if available
         if 'psnr_u' in baseline.columns and 'psnr_u' in test.columns:
-            results['bd_psnr_u'] = self.calculate_bd_psnr(baseline, test, psnr_col='psnr_u')
+            results['bd_psnr_u'] = bd_psnr('psnr_u')
         
         if 'psnr_v' in baseline.columns and 'psnr_v' in test.columns:
-            results['bd_psnr_v'] = self.calculate_bd_psnr(baseline, test, psnr_col='psnr_v')
+            results['bd_psnr_v'] = bd_psnr('psnr_v')
         
-        # Calculate BD-MOTA if available
+        # Calculate BD-MOTA if available (same method as BD-PSNR)
         if 'mota' in baseline.columns and 'mota' in test.columns:
-            results['bd_mota'] = self.calculate_bd_mota(baseline, test)
+            results['bd_mota'] = bd_psnr('mota')
         
         # Additional statistics
         results['avg_bitrate_baseline'] = baseline['bitrate'].mean()
@@ -280,6 +367,27 @@ class PerformanceEvaluator:
         
         return results
     
+    def _read_results(self, path: Path) -> pd.DataFrame:
+        """
+        Load a results table
+        
+        Parquet files are read directly; CSV files use the PyArrow CSV
+        reader when pyarrow is installed, else the default C engine.
+        
+        Args:
+            path: Path to results CSV (or Parquet)
+            
+        Returns:
+            Results dataframe
+        """
+        if Path(path).suffix == '.parquet':
+            return pd.read_parquet(path)
+        
+        try:
+            return pd.read_csv(path, engine='pyarrow')
+        except ImportError:
+            return pd.read_csv(path)
+    
     def generate_comparison_table(self,
                                  comparisons: List[Dict],
                                  output_path: Optional[Path] = None,
@@ -20,11 +20,77 @@ QP CALCULATION:
   QP_background = base_QP + alpha_bg
 """
 
+import weakref
 import numpy as np
 import cv2
 from typing import Dict, Optional, Tuple
 import logging
 
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+
+if NUMBA_AVAILABLE:
+    @njit(parallel=True, cache=True)
+    def _reduce_levels_numba(levels, values, n_chunks):
+        """
+        Per-level count, sum and sum of squares in one parallel pass
+        
+        Args:
+            levels: Flattened ROI map (N,) with levels 0, 1, 2
+            values: Flattened per-pixel values (N,)
+            n_chunks: Number of chunks reduced in parallel
+            
+        Returns:
+            Tuple of (counts, sums, sums_sq), each (3,)
+        """
+        n = levels.shape[0]
+        chunk = (n + n_chunks - 1) // n_chunks
+        partial = np.zeros((n_chunks, 3, 3))
+        for c in prange(n_chunks):
+            for i in range(c * chunk, min((c + 1) * chunk, n)):
+                level = levels[i]
+                if 0 <= level < 3:
+                    v = np.float64(values[i])
+                    partial[c, 0, level] += 1.0
+                    partial[c, 1, level] += v
+                    partial[c, 2, level] += v * v
+        totals = partial.sum(axis=0)
+        return totals[0], totals[1], totals[2]
+
+    @njit(parallel=True, cache=True)
+    def _apply_qp_lut_numba(levels, qp_lut, out):
+        """
+        Gather per-level QPs into a flat int16 QP map
+        
+        NumPy fancy indexing with small integer indices first widens them
+        to intp; this loop reads the ROI bytes directly (~10x faster on 4K).
+        
+        Args:
+            levels: Flattened ROI map (N,) with levels 0, 1, 2
+            qp_lut: Clipped QP per level (3,) int16
+            out: Output QP map (N,) int16
+            
+        Returns:
+            Number of pixels with a level above 2 (clamped, never read
+            out of bounds; the caller rejects the map)
+        """
+        n_invalid = 0
+        for i in prange(levels.shape[0]):
+            level = levels[i]
+            if level > 2:
+                n_invalid += 1
+                level = 2
+            out[i] = qp_lut[level]
+        return n_invalid
+
+
+# Below this many pixels the NumPy gather beats the parallel launch cost
+_QP_KERNEL_MIN_SIZE = 1 << 14
+
 
 class QPController:
     """
@@ -58,11 +124,30 @@ class QPController:
         self.texture_weight = adaptive.get('texture_weight', 0.3)
         self.motion_weight = adaptive.get('motion_weight', 0.2)
         self.normalize = adaptive.get('normalize', True)
+        self.static_texture_reuse = adaptive.get('static_texture_reuse', False)
         
         # QP constraints
         self.qp_min = qp_config.get('qp_min', 0)
         self.qp_max = qp_config.get('qp_max', 51)
         
+        # Per-level texture complexity keyed by id(frame), validated by weak
+        # references to (frame, roi_map): the same frame is typically
+        # analyzed once per base QP. Entries drop when the frame is freed.
+        self._texture_cache: Dict[int, Tuple[weakref.ref, weakref.ref, np.ndarray]] = {}
+        
+        # (signature, ROI map, textures) of the last analyzed frame, reused
+        # for following frames with the same coarse appearance and the
+        # identical ROI map (static shots)
+        self._static_texture: Optional[Tuple[tuple, np.ndarray, np.ndarray]] = None
+        
+        # Last ROI map converted to contiguous uint8, so repeated calls with
+        # the same wide-dtype map (one per base QP) convert it only once
+        self._roi_u8: Optional[Tuple[weakref.ref, np.ndarray]] = None
+        
+        # QP -> [0, 255] colormap index for integer QP maps (visualize_qp_map)
+        self._qp_norm_lut = ((np.arange(self.qp_max - self.qp_min + 1)) /
+                             (self.qp_max - self.qp_min) * 255).astype(np.uint8)
+        
         self.logger.info(f"QP Controller initialized:")
         self.logger.info(f"  Method: {self.method}")
         self.logger.info(f"  Base alpha: core={self.base_alpha_core}, "
@@ -84,8 +169,10 @@ class QPController:
             motion_map: Optional motion map for adaptive QP
             
         Returns:
-            QP map (H, W) with QP value for each pixel/CTU
+            QP map (H, W) int16 with QP value for each pixel/CTU
         """
+        roi_map = self._as_uint8_roi(roi_map)
+        
         # Calculate alpha values
         if self.adaptive_enabled and frame is not None:
             alphas = self._calculate_adaptive_alpha(roi_map, frame, motion_map)
@@ -96,18 +183,51 @@ class QPController:
                 'background': self.base_alpha_bg
             }
         
-        # Generate QP map
-        qp_map = np.full(roi_map.shape, base_qp, dtype=np.float32)
+        # QP per ROI level, clipped to valid range
+        qp_lut = np.array([
+            base_qp + alphas['background'],  # Background: Higher QP
+            base_qp - alphas['context'],  # Context: Medium QP
+            base_qp - alphas['core']  # Core: Lower QP
+        ], dtype=np.float32)
+        np.clip(qp_lut, self.qp_min, self.qp_max, out=qp_lut)
+        # QP fits in int16: half the per-pixel traffic of int32
+        qp_lut = qp_lut.astype(np.int16)
+        
+        # Generate QP map with a single gather; levels above 2 are rejected
+        # the same way on both paths
+        if NUMBA_AVAILABLE and roi_map.size >= _QP_KERNEL_MIN_SIZE:
+            qp_map = np.empty(roi_map.shape, dtype=np.int16)
+            n_invalid = _apply_qp_lut_numba(np.ascontiguousarray(roi_map).ravel(), qp_lut, qp_map.ravel())
+        else:
+            n_invalid = np.count_nonzero(roi_map > 2) if roi_map.size else 0
+            if not n_invalid:
+                qp_map = qp_lut[roi_map]
+        
+        if n_invalid:
+            raise ValueError(f"ROI map has {n_invalid} pixels with level > 2 (max {roi_map.max()})")
         
-        # Apply alpha values
-        qp_map[roi_map == 2] = base_qp - alphas['core']  # Core: Lower QP
-        qp_map[roi_map == 1] = base_qp - alphas['context']  # Context: Medium QP
-        qp_map[roi_map == 0] = base_qp + alphas['background']  # Background: Higher QP
+        return qp_map
+    
+    def _as_uint8_roi(self, roi_map: np.ndarray) -> np.ndarray:
+        """
+        Normalize ROI map to C-contiguous uint8 (1 byte/pixel for every
+        comparison, gather and bincount downstream)
+        
+        Args:
+            roi_map: ROI map (H, W) with levels 0, 1, 2
+            
+        Returns:
+            roi_map itself if already contiguous uint8, else a converted copy
+        """
+        if roi_map.dtype == np.uint8 and roi_map.flags.c_contiguous:
+            return roi_map
         
-        # Clip to valid range
-        qp_map = np.clip(qp_map, self.qp_min, self.qp_max)
+        if self._roi_u8 is not None and self._roi_u8[0]() is roi_map:
+            return self._roi_u8[1]
         
-        return qp_map.astype(np.int32)
+        converted = np.ascontiguousarray(roi_map, dtype=np.uint8)
+        self._roi_u8 = (weakref.ref(roi_map), converted)
+        return converted
     
     def _calculate_adaptive_alpha(self,
                                   roi_map: np.ndarray,
@@ -125,15 +245,11 @@ class QPController:
             Dictionary with alpha values for each level
         """
         # Calculate ROI densities
-        total_pixels = roi_map.size
-        density_core = np.sum(roi_map == 2) / total_pixels
-        density_context = np.sum(roi_map == 1) / total_pixels
-        density_bg = np.sum(roi_map == 0) / total_pixels
+        counts = np.bincount(roi_map.ravel(), minlength=3)
+        density_bg, density_context, density_core = counts[:3] / roi_map.size
         
-        # Calculate texture complexity for each level
-        texture_core = self._calculate_texture_complexity(frame, roi_map, level=2)
-        texture_context = self._calculate_texture_complexity(frame, roi_map, level=1)
-        texture_bg = self._calculate_texture_complexity(frame, roi_map, level=0)
+        # Calculate texture complexity for each level (independent of base QP)
+        texture_bg, texture_context, texture_core = self._get_texture_complexity(frame, roi_map)
         
         # Calculate motion complexity if available
         if motion_map is not None:
@@ -167,20 +283,79 @@ class QPController:
             'background': alpha_bg
         }
     
+    def _get_texture_complexity(self,
+                                frame: np.ndarray,
+                                roi_map: np.ndarray) -> np.ndarray:
+        """
+        Per-level texture complexity, reused while frame and ROI map are
+        the same objects (frames are not expected to change in place), or,
+        when static texture reuse is enabled, while consecutive frames keep
+        the same signature (see _frame_signature) and an identical ROI map
+        
+        Args:
+            frame: Input frame (BGR)
+            roi_map: ROI map
+            
+        Returns:
+            Normalized texture complexity [0, 1] per level (3,)
+        """
+        key = id(frame)
+        cached = self._texture_cache.get(key)
+        if cached is not None and cached[0]() is frame and cached[1]() is roi_map:
+            return cached[2]
+        
+        signature = None
+        if self.static_texture_reuse:
+            signature = self._frame_signature(frame)
+        
+        # Per-level textures depend on where the levels are, not only on
+        # how many pixels they cover: require the exact same ROI map
+        static = self._static_texture
+        if signature is not None and static is not None and static[0] == signature and \
+                (static[1] is roi_map or np.array_equal(static[1], roi_map)):
+            textures = static[2]
+        else:
+            textures = self._calculate_texture_complexity(frame, roi_map)
+            if signature is not None:
+                self._static_texture = (signature, roi_map.copy(), textures)
+        
+        if cached is None:
+            weakref.finalize(frame, self._texture_cache.pop, key, None)
+        self._texture_cache[key] = (weakref.ref(frame), weakref.ref(roi_map), textures)
+        
+        return textures
+    
+    @staticmethod
+    def _frame_signature(frame: np.ndarray) -> tuple:
+        """
+        Coarse frame-change signature: 8x8 area-averaged thumbnail quantized
+        to 16 levels
+        
+        Args:
+            frame: Input frame (BGR or grayscale)
+            
+        Returns:
+            Hashable signature
+        """
+        thumb = cv2.resize(frame, (8, 8), interpolation=cv2.INTER_AREA) // 16
+        return frame.shape, thumb.tobytes()
+    
     def _calculate_texture_complexity(self,
                                      frame: np.ndarray,
-                                     roi_map: np.ndarray,
-                                     level: int) -> float:
+                                     roi_map: np.ndarray) -> np.ndarray:
         """
-        Calculate texture complexity for a specific ROI level
+        Calculate texture complexity for every ROI level
+        
+        The Laplacian is computed once for the whole frame; per-level
+        variances are then reduced from per-level sums in one pass.
         
         Args:
             frame: Input frame (BGR)
             roi_map: ROI map
-            level: ROI level (0, 1, 2)
             
         Returns:
-            Normalized texture complexity [0, 1]
+            Normalized texture complexity [0, 1] per level (3,)
+            (0.5 for empty levels)
         """
         # Convert to grayscale
         if len(frame.shape) == 3:
@@ -188,23 +363,30 @@ class QPController:
         else:
             gray = frame
         
-        # Get mask for this level
-        mask = (roi_map == level).astype(np.uint8)
-        
-        if np.sum(mask) == 0:
-            return 0.5  # Default for empty regions
+        # Calculate Laplacian (edge strength); the 3x3 aperture on uint8
+        # input stays within int16, so use the narrower SIMD path
+        laplacian = cv2.Laplacian(gray, cv2.CV_16S).ravel()
         
-        # Calculate Laplacian variance (edge strength)
-        laplacian = cv2.Laplacian(gray, cv2.CV_64F)
-        laplacian_masked = laplacian * mask
+        # Per-level count, sum and sum of squares
+        levels = roi_map.ravel()
+        if NUMBA_AVAILABLE:
+            counts, sums, sums_sq = _reduce_levels_numba(levels, laplacian, 64)
+        else:
+            counts = np.bincount(levels, minlength=3)[:3]
+            sums = np.bincount(levels, weights=laplacian, minlength=3)[:3]
+            sums_sq = np.bincount(levels, weights=np.square(laplacian, dtype=np.int32),
+                                  minlength=3)[:3]
         
         # Variance as texture measure
-        variance = np.var(laplacian_masked[mask > 0])
+        nonempty = counts > 0
+        safe_counts = np.maximum(counts, 1)
+        means = sums / safe_counts
+        variance = np.maximum(sums_sq / safe_counts - means * means, 0.0)
         
         # Normalize to [0, 1] range (typical variance range: 0-1000)
         normalized = np.clip(variance / 1000.0, 0.0, 1.0)
         
-        return float(normalized)
+        return np.where(nonempty, normalized, 0.5)  # Default for empty regions
     
     def _calculate_motion_complexity(self, motion_map: np.ndarray) -> float:
         """
@@ -281,23 +463,20 @@ class QPController:
         n_ctu_h = (height + ctu_size - 1) // ctu_size
         n_ctu_w = (width + ctu_size - 1) // ctu_size
         
-        ctu_qp_map = np.zeros((n_ctu_h, n_ctu_w), dtype=np.int32)
-        
-        for i in range(n_ctu_h):
-            for j in range(n_ctu_w):
-                # Get CTU region
-                y1 = i * ctu_size
-                y2 = min((i + 1) * ctu_size, height)
-                x1 = j * ctu_size
-                x2 = min((j + 1) * ctu_size, width)
-                
-                # Average QP in this CTU
-                ctu_qp = qp_map[y1:y2, x1:x2]
-                avg_qp = int(np.round(np.mean(ctu_qp)))
-                
-                ctu_qp_map[i, j] = np.clip(avg_qp, self.qp_min, self.qp_max)
-        
-        return ctu_qp_map
+        # Zero-pad to whole CTUs and sum each CTU in one reduction
+        pad_h = n_ctu_h * ctu_size - height
+        pad_w = n_ctu_w * ctu_size - width
+        padded = np.pad(qp_map, ((0, pad_h), (0, pad_w))) if pad_h or pad_w else qp_map
+        ctu_sums = padded.reshape(n_ctu_h, ctu_size, n_ctu_w, ctu_size).sum(
+            axis=(1, 3), dtype=np.float64
+        )
+        
+        # Average QP per CTU over its real pixels (edge CTUs are smaller)
+        ctu_h = np.minimum(ctu_size, height - np.arange(n_ctu_h) * ctu_size)
+        ctu_w = np.minimum(ctu_size, width - np.arange(n_ctu_w) * ctu_size)
+        avg_qp = np.round(ctu_sums / np.outer(ctu_h, ctu_w))
+        
+        return np.clip(avg_qp, self.qp_min, self.qp_max).astype(np.int32)
     
     def visualize_qp_map(self,
                         qp_map: np.ndarray,
@@ -315,7 +494,11 @@ class QPController:
             Colored QP visualization
         """
         # Normalize QP values to [0, 255] for colormap
-        qp_normalized = ((qp_map - self.qp_min) / (self.qp_max - self.qp_min) * 255).astype(np.uint8)
+        if np.issubdtype(qp_map.dtype, np.integer):
+            idx = np.clip(qp_map - self.qp_min, 0, len(self._qp_norm_lut) - 1)
+            qp_normalized = self._qp_norm_lut[idx]
+        else:
+            qp_normalized = ((qp_map - self.qp_min) / (self.qp_max - self.qp_min) * 255).astype(np.uint8)
         
         # Apply colormap (blue=low QP/high quality, red=high QP/low quality)
         qp_colored = cv2.applyColorMap(qp_normalized, cv2.COLORMAP_JET)
@@ -354,23 +537,51 @@ class QPController:
         stats = {}
         
         level_names = {0: 'background', 1: 'context', 2: 'core'}
+        empty = {'mean_qp': 0.0, 'min_qp': 0, 'max_qp': 0, 'std_qp': 0.0}
+        
+        # Integer QPs span a small range: one joint (level, QP) histogram
+        # yields count, mean, std, min and max of every level exactly
+        qp_range = None
+        if np.issubdtype(qp_map.dtype, np.integer) and qp_map.size > 0:
+            qp_lo, qp_hi = int(qp_map.min()), int(qp_map.max())
+            if qp_hi - qp_lo < 1024:
+                qp_range = (qp_lo, qp_hi)
+        
+        if qp_range is None:
+            for level in range(3):
+                mask = (roi_map == level)
+                if np.count_nonzero(mask) > 0:
+                    qp_values = qp_map[mask]
+                    stats[level_names[level]] = {
+                        'mean_qp': float(np.mean(qp_values)),
+                        'min_qp': int(np.min(qp_values)),
+                        'max_qp': int(np.max(qp_values)),
+                        'std_qp': float(np.std(qp_values))
+                    }
+                else:
+                    stats[level_names[level]] = dict(empty)
+            return stats
+        
+        qp_lo, qp_hi = qp_range
+        n_bins = qp_hi - qp_lo + 1
+        qp_flat = qp_map.ravel()
+        joint = np.bincount(roi_map.ravel().astype(np.intp) * n_bins + (qp_flat - qp_lo),
+                            minlength=3 * n_bins)[:3 * n_bins].reshape(3, n_bins)
+        qp_values = np.arange(qp_lo, qp_lo + n_bins, dtype=np.float64)
         
         for level in range(3):
-            mask = (roi_map == level)
-            if np.sum(mask) > 0:
-                qp_values = qp_map[mask]
+            hist = joint[level]
+            count = hist.sum()
+            if count > 0:
+                mean = (hist @ qp_values) / count
+                present = np.flatnonzero(hist)
                 stats[level_names[level]] = {
-                    'mean_qp': float(np.mean(qp_values)),
-                    'min_qp': int(np.min(qp_values)),
-                    'max_qp': int(np.max(qp_values)),
-                    'std_qp': float(np.std(qp_values))
+                    'mean_qp': float(mean),
+                    'min_qp': int(qp_lo + present[0]),
+                    'max_qp': int(qp_lo + present[-1]),
+                    'std_qp': float(np.sqrt((hist @ np.square(qp_values - mean)) / count))
                 }
             else:
-                stats[level_names[level]] = {
-                    'mean_qp': 0.0,
-                    'min_qp': 0,
-                    'max_qp': 0,
-                    'std_qp': 0.0
-                }
+                stats[level_names[level]] = dict(empty)
         
         return stats
@@ -35,9 +35,37 @@ class ROIDetector:
         self.nms_threshold = self.roi_config['nms_threshold']
         self.device = self.roi_config['device']
         
+        # Inference precision: fp32, fp16 (CUDA), int8 (TensorRT engine, CUDA)
+        self.precision = self.roi_config.get('precision', 'fp32')
+        self.use_cuda = str(self.device).startswith('cuda')
+        if self.precision != 'fp32' and not self.use_cuda:
+            self.logger.warning(f"{self.precision} inference requires CUDA, using fp32")
+            self.precision = 'fp32'
+        
         # Load model
         self.model = self._load_model()
         
+        # Arguments shared by every predict call
+        self._predict_kwargs = {
+            'conf': self.confidence_threshold,
+            'iou': self.nms_threshold,
+            'half': self.precision == 'fp16',
+            'verbose': False,
+        }
+        
+        # Double-buffered pinned-memory upload for detect_batch (CUDA only;
+        # not for TensorRT engines, whose input shape is fixed at export)
+        self.async_upload = self.roi_config.get('async_upload', True) and self.use_cuda and \
+            self.precision != 'int8'
+        self.imgsz = self.roi_config.get('imgsz', 640)
+        self._upload_buffers = None  # Pinned/device slots, copy stream, input; per batch shape
+        
+        # Direct forward + NMS for single frames, skipping Ultralytics' per-call
+        # preprocessing (not for TensorRT engines); buffers follow frame shape
+        self.direct_inference = self.roi_config.get('direct_inference', True) and \
+            self.precision != 'int8'
+        self._direct = None
+        
         self.logger.info(f"ROI Detector initialized: {self.detector_type}{self.model_size}")
     
     def _load_model(self):
@@ -63,12 +91,38 @@ class ROIDetector:
             # Move to device
             model.to(self.device)
             
+            if self.precision == 'int8':
+                model = self._load_tensorrt_engine(model, model_path)
+            
             return model
             
         except Exception as e:
             self.logger.error(f"Failed to load model: {e}")
             raise
     
+    def _load_tensorrt_engine(self, model, model_path: Path):
+        """
+        Load (exporting on first use) an INT8 TensorRT engine of the model
+        
+        INT8 calibration costs a small mAP drop (typically < 1 point for
+        YOLOv8 on COCO) for roughly 2x the FP16 throughput.
+        
+        Args:
+            model: Loaded YOLO model
+            model_path: Path of the .pt weights
+            
+        Returns:
+            YOLO model backed by the TensorRT engine
+        """
+        from ultralytics import YOLO
+        
+        engine_path = model_path.with_suffix('.engine')
+        if not engine_path.exists():
+            self.logger.info(f"Exporting INT8 TensorRT engine to {engine_path}...")
+            engine_path = Path(model.export(format='engine', int8=True, device=self.device))
+        
+        return YOLO(str(engine_path), task='detect')
+    
     def detect(self, frame: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
         """
         Detect objects in frame
@@ -82,32 +136,152 @@ class ROIDetector:
             - scores: (N,) array of confidence scores
             - class_ids: (N,) array of class IDs
         """
+        if self.direct_inference:
+            try:
+                return self._detect_direct(frame)
+            except Exception as e:
+                self.logger.warning(f"Direct inference failed, using predictor: {e}")
+                self.direct_inference = False
+        
         try:
             # Run detection
-            results = self.model(
-                frame,
-                conf=self.confidence_threshold,
-                iou=self.nms_threshold,
-                verbose=False
-            )
+            results = self.model(frame, **self._predict_kwargs)
             
             # Extract results
-            if len(results) > 0 and len(results[0].boxes) > 0:
-                boxes = results[0].boxes
-                bboxes = boxes.xyxy.cpu().numpy()  # (N, 4) [x1, y1, x2, y2]
-                scores = boxes.conf.cpu().numpy()  # (N,)
-                class_ids = boxes.cls.cpu().numpy().astype(int)  # (N,)
-            else:
-                bboxes = np.empty((0, 4))
-                scores = np.empty((0,))
-                class_ids = np.empty((0,), dtype=int)
+            if len(results) > 0:
+                return self._unpack_result(results[0])
             
-            return bboxes, scores, class_ids
+            return np.empty((0, 4)), np.empty((0,)), np.empty((0,), dtype=int)
             
         except Exception as e:
             self.logger.error(f"Detection failed: {e}")
             return np.empty((0, 4)), np.empty((0,)), np.empty((0,), dtype=int)
     
+    def _setup_direct(self, frame: np.ndarray) -> Dict:
+        """
+        Prepare letterbox geometry and persistent buffers for a frame shape
+        
+        Mirrors Ultralytics' LetterBox (auto stride padding, centered, pad
+        value 114) so boxes match the predictor path. One regular predict
+        call initializes the predictor's AutoBackend, which is reused.
+        
+        Args:
+            frame: Input frame (H, W, 3) in BGR format
+            
+        Returns:
+            Dictionary with geometry and buffers
+        """
+        (new_w, new_h), (top, left), (in_h, in_w) = self._letterbox_geometry(*frame.shape[:2])
+        backend = self._backend(frame)
+        
+        staging = torch.full((in_h, in_w, 3), 114, dtype=torch.uint8)
+        if self.use_cuda:
+            staging = staging.pin_memory()
+        
+        return {
+            'frame_shape': frame.shape,
+            'resized': (new_w, new_h),
+            'offset': (top, left),
+            'input_shape': (in_h, in_w),
+            'backend': backend,
+            'staging': staging,
+            'device_u8': torch.empty((in_h, in_w, 3), dtype=torch.uint8, device=self.device),
+            'input': torch.empty((1, 3, in_h, in_w),
+                                 dtype=torch.float16 if backend.fp16 else torch.float32,
+                                 device=self.device),
+        }
+    
+    def _letterbox_geometry(self, h: int, w: int) -> Tuple[Tuple[int, int], Tuple[int, int], Tuple[int, int]]:
+        """
+        Letterbox geometry of Ultralytics' LetterBox (auto stride padding, centered)
+        
+        Args:
+            h: Frame height
+            w: Frame width
+            
+        Returns:
+            ((new_w, new_h) resized size, (top, left) offset, (in_h, in_w) input size)
+        """
+        r = min(self.imgsz / h, self.imgsz / w)
+        new_w, new_h = int(round(w * r)), int(round(h * r))
+        dw = ((self.imgsz - new_w) % 32) / 2
+        dh = ((self.imgsz - new_h) % 32) / 2
+        top, bottom = int(round(dh - 0.1)), int(round(dh + 0.1))
+        left, right = int(round(dw - 0.1)), int(round(dw + 0.1))
+        return (new_w, new_h), (top, left), (new_h + top + bottom, new_w + left + right)
+    
+    def _backend(self, frame: np.ndarray):
+        """
+        Predictor's AutoBackend, initialized by one regular predict call
+        
+        Args:
+            frame: Input frame (H, W, 3) in BGR format
+            
+        Returns:
+            AutoBackend module
+        """
+        if self.model.predictor is None:
+            self.model(frame, **self._predict_kwargs)
+        return self.model.predictor.model
+    
+    @staticmethod
+    def _unpack_det(det, input_shape: Tuple[int, int],
+                    frame_shape: Tuple[int, ...]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Convert one NMS output, rescaled from letterboxed input to frame coordinates
+        
+        Args:
+            det: NMS output (N, 6) [x1, y1, x2, y2, conf, cls] tensor
+            input_shape: Network input (H, W)
+            frame_shape: Original frame shape
+            
+        Returns:
+            Tuple of (bboxes, scores, class_ids)
+        """
+        from ultralytics.utils import ops
+        
+        if len(det) == 0:
+            return np.empty((0, 4)), np.empty((0,)), np.empty((0,), dtype=int)
+        
+        det[:, :4] = ops.scale_boxes(input_shape, det[:, :4], frame_shape)
+        det = det.float().cpu().numpy()
+        return det[:, :4], det[:, 4], det[:, 5].astype(int)
+    
+    @torch.no_grad()
+    def _detect_direct(self, frame: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Detect objects by calling the network and NMS directly
+        
+        Args:
+            frame: Input frame (H, W, 3) in BGR format
+            
+        Returns:
+            Tuple of (bboxes, scores, class_ids)
+        """
+        from ultralytics.utils import ops
+        
+        if self._direct is None or self._direct['frame_shape'] != frame.shape:
+            self._direct = self._setup_direct(frame)
+        d = self._direct
+        
+        # Letterbox into the pinned staging buffer (padding is persistent)
+        top, left = d['offset']
+        new_w, new_h = d['resized']
+        staging = d['staging'].numpy()
+        staging[top:top + new_h, left:left + new_w] = cv2.resize(
+            frame, (new_w, new_h), interpolation=cv2.INTER_LINEAR
+        )
+        
+        # Upload, then BGR HWC uint8 -> RGB NCHW in [0, 1] on device
+        d['device_u8'].copy_(d['staging'], non_blocking=True)
+        x = d['input']
+        x.copy_(d['device_u8'].flip(-1).permute(2, 0, 1).unsqueeze(0))
+        x.div_(255.0)
+        
+        preds = d['backend'](x)
+        det = ops.non_max_suppression(preds, self.confidence_threshold, self.nms_threshold)[0]
+        return self._unpack_det(det, d['input_shape'], frame.shape)
+    
     def detect_batch(self, frames: List[np.ndarray]) -> List[Tuple[np.ndarray, np.ndarray, np.ndarray]]:
         """
         Detect objects in batch of frames
@@ -119,6 +293,14 @@ class ROIDetector:
             List of (bboxes, scores, class_ids) tuples
         """
         batch_size = self.roi_config.get('batch_size', 1)
+        
+        if self.async_upload and len(frames) > 0 and \
+                all(f.shape == frames[0].shape for f in frames):
+            try:
+                return self._detect_batch_pipelined(frames, batch_size)
+            except Exception as e:
+                self.logger.warning(f"Pipelined batch detection failed, falling back: {e}")
+        
         results = []
         
         for i in range(0, len(frames), batch_size):
@@ -126,26 +308,11 @@ class ROIDetector:
             
             try:
                 # Run batch detection
-                batch_results = self.model(
-                    batch,
-                    conf=self.confidence_threshold,
-                    iou=self.nms_threshold,
-                    verbose=False
-                )
+                batch_results = self.model(batch, **self._predict_kwargs)
                 
                 # Extract results for each frame
                 for result in batch_results:
-                    if len(result.boxes) > 0:
-                        boxes = result.boxes
-                        bboxes = boxes.xyxy.cpu().numpy()
-                        scores = boxes.conf.cpu().numpy()
-                        class_ids = boxes.cls.cpu().numpy().astype(int)
-                    else:
-                        bboxes = np.empty((0, 4))
-                        scores = np.empty((0,))
-                        class_ids = np.empty((0,), dtype=int)
-                    
-                    results.append((bboxes, scores, class_ids))
+                    results.append(self._unpack_result(result))
                     
             except Exception as e:
                 self.logger.error(f"Batch detection failed: {e}")
@@ -155,6 +322,154 @@ class ROIDetector:
         
         return results
     
+    @torch.no_grad()
+    def _detect_batch_pipelined(self,
+                                frames: List[np.ndarray],
+                                batch_size: int) -> List[Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+        """
+        Batch detection with the H2D copy of batch N+1 overlapping inference of batch N
+        
+        Frames are staged into one of two pinned host buffers and uploaded with
+        non_blocking copies on a dedicated stream; the compute stream waits on
+        the copy event, then letterboxes on the GPU with the same geometry as
+        detect(), runs the network and NMS, and rescales boxes to the frame.
+        
+        Args:
+            frames: List of frames with identical shape (H, W, 3) in BGR format
+            batch_size: Frames per inference call
+            
+        Returns:
+            List of (bboxes, scores, class_ids) tuples
+        """
+        import torch.nn.functional as F
+        from ultralytics.utils import ops
+        
+        frame_shape = frames[0].shape
+        h, w = frame_shape[:2]
+        (new_w, new_h), (top, left), input_shape = self._letterbox_geometry(h, w)
+        shape = (batch_size, h, w, 3)
+        
+        if self._upload_buffers is None or self._upload_buffers['shape'] != shape:
+            backend = self._backend(frames[0])
+            # Letterboxed network input; the 114 padding persists across batches
+            net_input = torch.full((batch_size, 3, *input_shape), 114 / 255.0,
+                                   dtype=torch.float16 if backend.fp16 else torch.float32,
+                                   device=self.device)
+            self._upload_buffers = {
+                'shape': shape,
+                'slots': [
+                    (torch.empty(shape, dtype=torch.uint8).pin_memory(),
+                     torch.empty(shape, dtype=torch.uint8, device=self.device),
+                     torch.cuda.Event())
+                    for _ in range(2)
+                ],
+                'copy_stream': torch.cuda.Stream(device=self.device),
+                'backend': backend,
+                'input': net_input,
+            }
+        buffers = self._upload_buffers
+        slots = buffers['slots']
+        copy_stream = buffers['copy_stream']
+        compute_stream = torch.cuda.current_stream(device=self.device)
+        
+        def upload(start: int, slot: int) -> int:
+            pinned, device_buf, event = slots[slot]
+            batch = frames[start:start + batch_size]
+            np.stack(batch, out=pinned.numpy()[:len(batch)])
+            with torch.cuda.stream(copy_stream):
+                device_buf[:len(batch)].copy_(pinned[:len(batch)], non_blocking=True)
+                event.record(copy_stream)
+            return len(batch)
+        
+        results = []
+        starts = list(range(0, len(frames), batch_size))
+        n = upload(starts[0], 0)
+        
+        for k, start in enumerate(starts):
+            _, device_buf, event = slots[k % 2]
+            n_cur = n
+            
+            # Queue the next upload before blocking on this batch's inference
+            if k + 1 < len(starts):
+                n = upload(starts[k + 1], (k + 1) % 2)
+            
+            compute_stream.wait_event(event)
+            # BGR uint8 NHWC -> RGB float NCHW in [0, 1], resized into the letterbox
+            x = device_buf[:n_cur].flip(-1).permute(0, 3, 1, 2).float().div_(255.0)
+            net_input = buffers['input'][:n_cur]
+            net_input[:, :, top:top + new_h, left:left + new_w] = F.interpolate(
+                x, size=(new_h, new_w), mode='bilinear', align_corners=False
+            )
+            
+            preds = buffers['backend'](net_input)
+            for det in ops.non_max_suppression(preds, self.confidence_threshold, self.nms_threshold):
+                results.append(self._unpack_det(det, input_shape, frame_shape))
+        
+        return results
+    
+    @staticmethod
+    def _unpack_result(result) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Convert one Ultralytics result to (bboxes, scores, class_ids) arrays
+        
+        Args:
+            result: Ultralytics Results object
+            
+        Returns:
+            Tuple of (bboxes, scores, class_ids)
+        """
+        if len(result.boxes) == 0:
+            return np.empty((0, 4)), np.empty((0,)), np.empty((0,), dtype=int)
+        
+        boxes = result.boxes
+        bboxes = boxes.xyxy.cpu().numpy()  # (N, 4) [x1, y1, x2, y2]
+        scores = boxes.conf.cpu().numpy()  # (N,)
+        class_ids = boxes.cls.cpu().numpy().astype(int)  # (N,)
+        return bboxes, scores, class_ids
+    
+    def filter(self,
+               bboxes: np.ndarray,
+               scores: np.ndarray,
+               class_ids: np.ndarray,
+               target_classes: Optional[List[int]] = None,
+               min_size: int = 0,
+               max_size: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Filter detections by class and bounding box size with one combined mask
+        
+        Args:
+            bboxes: Bounding boxes (N, 4)
+            scores: Confidence scores (N,)
+            class_ids: Class IDs (N,)
+            target_classes: List of target class IDs (None = all classes)
+            min_size: Minimum box size (width or height)
+            max_size: Maximum box size (None = no limit)
+            
+        Returns:
+            Filtered (bboxes, scores, class_ids)
+        """
+        if len(bboxes) == 0:
+            return bboxes, scores, class_ids
+        
+        mask = np.ones(len(bboxes), dtype=bool)
+        
+        if min_size > 0 or max_size is not None:
+            widths = bboxes[:, 2] - bboxes[:, 0]
+            heights = bboxes[:, 3] - bboxes[:, 1]
+            mask &= (widths >= min_size) & (heights >= min_size)
+            if max_size is not None:
+                mask &= (widths <= max_size) & (heights <= max_size)
+        
+        if target_classes is not None:
+            # Boolean lookup table over class IDs instead of np.isin
+            target_classes = np.asarray(target_classes, dtype=int)
+            n_classes = max(int(class_ids.max()), int(target_classes.max(initial=-1))) + 1
+            class_lut = np.zeros(n_classes, dtype=bool)
+            class_lut[target_classes] = True
+            mask &= class_lut[class_ids]
+        
+        return bboxes[mask], scores[mask], class_ids[mask]
+    
     def filter_by_class(self,
                        bboxes: np.ndarray,
                        scores: np.ndarray,
@@ -175,9 +490,7 @@ class ROIDetector:
         if target_classes is None or len(bboxes) == 0:
             return bboxes, scores, class_ids
         
-        # Filter by class
-        mask = np.isin(class_ids, target_classes)
-        return bboxes[mask], scores[mask], class_ids[mask]
+        return self.filter(bboxes, scores, class_ids, target_classes=target_classes)
     
     def filter_by_size(self,
                       bboxes: np.ndarray,
@@ -198,26 +511,16 @@ class ROIDetector:
         Returns:
             Filtered (bboxes, scores, class_ids)
         """
-        if len(bboxes) == 0:
-            return bboxes, scores, class_ids
-        
-        # Calculate box sizes
-        widths = bboxes[:, 2] - bboxes[:, 0]
-        heights = bboxes[:, 3] - bboxes[:, 1]
-        
-        # Filter by size
-        mask = (widths >= min_size) & (heights >= min_size)
-        if max_size is not None:
-            mask &= (widths <= max_size) & (heights <= max_size)
-        
-        return bboxes[mask], scores[mask], class_ids[mask]
+        return self.filter(bboxes, scores, class_ids, min_size=min_size, max_size=max_size)
     
     def visualize_detections(self,
                             frame: np.ndarray,
                             bboxes: np.ndarray,
                             scores: np.ndarray,
                             class_ids: np.ndarray,
-                            class_names: Optional[Dict[int, str]] = None) -> np.ndarray:
+                            class_names: Optional[Dict[int, str]] = None,
+                            inplace: bool = False,
+                            out: Optional[np.ndarray] = None) -> np.ndarray:
         """
         Visualize detections on frame
         
@@ -227,11 +530,17 @@ class ROIDetector:
             scores: Confidence scores (N,)
             class_ids: Class IDs (N,)
             class_names: Dictionary mapping class IDs to names
+            inplace: Draw directly on frame (no copy)
+            out: Optional reusable output buffer with frame's shape and dtype
             
         Returns:
             Visualized frame
         """
-        vis_frame = frame.copy()
+        if inplace:
+            vis_frame = frame
+        else:
+            vis_frame = out if out is not None else np.empty_like(frame)
+            np.copyto(vis_frame, frame)
         
         for bbox, score, class_id in zip(bboxes, scores, class_ids):
             x1, y1, x2, y2 = bbox.astype(int)
@@ -266,6 +575,7 @@ class ROIDetector:
             'detector': self.detector_type,
             'model_size': self.model_size,
             'device': self.device,
+            'precision': self.precision,
             'confidence_threshold': self.confidence_threshold,
             'nms_threshold': self.nms_threshold,
         }
@@ -274,12 +584,17 @@ class ROIDetector:
         """
         Benchmark detection speed
         
+        Host time is measured with perf_counter_ns around each call; on CUDA,
+        event pairs also time the GPU work, so H2D/pre-processing bound runs
+        (cpu_ms >> gpu_ms) can be told apart from compute bound ones.
+        
         Args:
             frame: Test frame
             n_runs: Number of runs
             
         Returns:
-            Dictionary with benchmark results
+            Dictionary with benchmark results (times in seconds, plus
+            cpu_ms and, on CUDA, gpu_ms means)
         """
         import time
         
@@ -287,20 +602,35 @@ class ROIDetector:
         for _ in range(10):
             self.detect(frame)
         
+        if self.use_cuda:
+            torch.cuda.synchronize()
+            events = [(torch.cuda.Event(enable_timing=True), torch.cuda.Event(enable_timing=True))
+                      for _ in range(n_runs)]
+        
         # Benchmark
-        times = []
-        for _ in range(n_runs):
-            start = time.time()
+        times_ns = np.empty(n_runs, dtype=np.int64)
+        for i in range(n_runs):
+            if self.use_cuda:
+                events[i][0].record()
+            start = time.perf_counter_ns()
             self.detect(frame)
-            end = time.time()
-            times.append(end - start)
+            if self.use_cuda:
+                events[i][1].record()
+                torch.cuda.synchronize()
+            times_ns[i] = time.perf_counter_ns() - start
         
-        times = np.array(times)
+        times = times_ns / 1e9
         
-        return {
+        results = {
             'mean_time': np.mean(times),
             'std_time': np.std(times),
             'min_time': np.min(times),
             'max_time': np.max(times),
             'fps': 1.0 / np.mean(times),
+            'cpu_ms': np.mean(times) * 1e3,
         }
+        
+        if self.use_cuda:
+            results['gpu_ms'] = float(np.mean([s.elapsed_time(e) for s, e in events]))
+        
+        return results
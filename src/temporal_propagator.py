@@ -19,13 +19,97 @@ IMPLEMENTATION:
 - Configurable keyframe interval
 """
 
+import os
+import threading
+from functools import partial
+from collections import deque
+from collections.abc import Sequence
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
 import cv2
-from typing import List, Tuple, Dict, Optional
+from typing import Iterator, List, Tuple, Dict, Optional
 import logging
 from pathlib import Path
 
 
+# Rows per band in the max-flow scan (a 1080p band stays in L2)
+_FLOW_BAND_ROWS = 64
+
+
+class SequenceDetections(Sequence):
+    """
+    Detections of a whole sequence stored column-wise: all frames' boxes,
+    scores and class IDs are concatenated, and frame i owns rows
+    offsets[i]:offsets[i+1] (CSR layout). Indexing a frame still yields
+    a (bboxes, scores, class_ids) tuple of views.
+    """
+    
+    def __init__(self,
+                 bboxes: np.ndarray,
+                 scores: np.ndarray,
+                 class_ids: np.ndarray,
+                 offsets: np.ndarray):
+        """
+        Args:
+            bboxes: All bounding boxes (N, 4) [x1, y1, x2, y2]
+            scores: All confidence scores (N,)
+            class_ids: All class IDs (N,)
+            offsets: Row offsets per frame (n_frames + 1,)
+        """
+        self.bboxes = bboxes
+        self.scores = scores
+        self.class_ids = class_ids
+        self.offsets = offsets
+    
+    @classmethod
+    def from_frames(cls, detections: List[Tuple[np.ndarray, np.ndarray, np.ndarray]]) -> 'SequenceDetections':
+        """
+        Build from per-frame (bboxes, scores, class_ids) tuples
+        
+        Args:
+            detections: List of per-frame detections
+            
+        Returns:
+            SequenceDetections
+        """
+        counts = [len(det[0]) for det in detections]
+        offsets = np.zeros(len(detections) + 1, dtype=np.int64)
+        np.cumsum(counts, out=offsets[1:])
+        
+        if not detections:
+            return cls(np.empty((0, 4)), np.empty((0,)), np.empty((0,), dtype=int), offsets)
+        
+        return cls(
+            np.concatenate([np.asarray(det[0]).reshape(-1, 4) for det in detections]),
+            np.concatenate([det[1] for det in detections]),
+            np.concatenate([det[2] for det in detections]),
+            offsets
+        )
+    
+    @property
+    def counts(self) -> np.ndarray:
+        """Number of detections per frame (n_frames,)"""
+        return np.diff(self.offsets)
+    
+    @property
+    def frame_indices(self) -> np.ndarray:
+        """Frame index of every detection row (N,)"""
+        return np.repeat(np.arange(len(self)), self.counts)
+    
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+    
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        start, end = self.offsets[i], self.offsets[i + 1]
+        return self.bboxes[start:end], self.scores[start:end], self.class_ids[start:end]
+
+
 class TemporalPropagator:
     """
     Temporal ROI Propagation using motion tracking
@@ -48,10 +132,49 @@ class TemporalPropagator:
         self.motion_threshold = temporal_cfg.get('redetection_triggers', {}).get('motion_threshold', 30.0)
         self.redetection_threshold = temporal_cfg.get('redetection_triggers', {}).get('redetection_threshold', 50.0)
         self.optical_flow_method = temporal_cfg.get('optical_flow_method', 'farneback')
+        self._redetection_threshold_sq = self.redetection_threshold ** 2
+        
+        # Flow sample grid per bbox side (1 = center only)
+        self.flow_sample_grid = temporal_cfg.get('flow_sample_grid', 3)
+        k = self.flow_sample_grid
+        frac = (np.arange(k) + 0.5) / k if k > 1 else np.array([0.5])
+        self._sample_fractions = (frac[None, :], frac[None, :])
+        
+        # Overlap grayscale conversion and keyframe detection (worker threads)
+        # with optical flow and propagation (caller thread)
+        self.pipelined = temporal_cfg.get('pipelined', True)
+        self.gray_lookahead = temporal_cfg.get('gray_lookahead', 2)
+        self.keyframe_batch = temporal_cfg.get('keyframe_batch', 8)
         
         # Optical flow parameters
         self.flow_params = self._init_flow_params()
         
+        # Farneback on the GPU when OpenCV is built with CUDA
+        self.use_cuda = temporal_cfg.get('use_cuda', True) and self._cuda_available()
+        self._cuda_flow = None
+        self._gpu_gray = None  # [GpuMat, GpuMat] ring for prev / current gray
+        self._gpu_last = None  # Host gray frame held by the ring's last slot
+        
+        # Flow callables with the parameters bound once
+        self._flow_fn = self._make_flow_fn()
+        self._lk_fn = (partial(cv2.calcOpticalFlowPyrLK, **self.flow_params)
+                       if self.optical_flow_method == 'lucas_kanade' else None)
+        
+        # Per-frame work buffers, (re)allocated when the frame size changes
+        self._flow_buf = None
+        self._mag_buf = None
+        
+        # OpenCV worker threads for flow / magnitude (-1 = all cores,
+        # None = leave OpenCV's setting alone). cv2.setNumThreads is
+        # process-wide, so it is only applied when configured
+        num_threads = temporal_cfg.get('num_threads', None)
+        if num_threads is not None:
+            cv2.setNumThreads((os.cpu_count() or 1) if num_threads < 0 else num_threads)
+        
+        # Flow is computed at this fraction of the frame size, then upscaled
+        self.flow_scale = temporal_cfg.get('flow_scale', 0.5)
+        self._last_small = None  # (gray, downscaled gray) of the last frame
+        
         self.logger.info(f"Temporal Propagator initialized:")
         self.logger.info(f"  Keyframe interval: {self.keyframe_interval}")
         self.logger.info(f"  Motion threshold: {self.motion_threshold}")
@@ -78,10 +201,33 @@ class TemporalPropagator:
         else:
             return {}
     
+    def _make_flow_fn(self):
+        """
+        Build the dense flow callable with the Farneback parameters bound
+        
+        Returns:
+            Callable (prev_gray, gray, out) -> flow (H, W, 2)
+        """
+        if self.optical_flow_method == 'farneback' and self.use_cuda:
+            return self._farneback_cuda
+        
+        if self.optical_flow_method == 'farneback':
+            p = self.flow_params
+            args = (p['pyr_scale'], p['levels'], p['winsize'], p['iterations'],
+                    p['poly_n'], p['poly_sigma'], p['flags'])
+        else:
+            # Fallback to simple dense flow
+            args = (0.5, 3, 15, 3, 5, 1.2, 0)
+        
+        def flow_fn(prev_gray, gray, out=None):
+            return cv2.calcOpticalFlowFarneback(prev_gray, gray, out, *args)
+        
+        return flow_fn
+    
     def propagate_roi_sequence(self, 
                                frames: List[np.ndarray],
                                detector,
-                               detector_interval: Optional[int] = None) -> List[Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+                               detector_interval: Optional[int] = None) -> SequenceDetections:
         """
         Propagate ROI across entire sequence with adaptive re-detection
         
@@ -91,7 +237,8 @@ class TemporalPropagator:
             detector_interval: How often to run detector (None = use keyframe_interval)
             
         Returns:
-            List of (bboxes, scores, class_ids) for each frame
+            SequenceDetections; indexing/iterating yields (bboxes, scores,
+            class_ids) for each frame
         """
         if detector_interval is None:
             detector_interval = self.keyframe_interval
@@ -102,53 +249,151 @@ class TemporalPropagator:
         
         self.logger.info(f"Propagating ROI across {n_frames} frames (interval={detector_interval})")
         
-        for i, frame in enumerate(frames):
-            # Convert to grayscale for optical flow
-            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        # Detector calls may come from the keyframe worker and from
+        # re-detections on this thread; serialize them
+        detect_lock = threading.Lock()
+        
+        def detect(frame: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+            with detect_lock:
+                return detector.detect(frame)
+        
+        def detect_batch(batch: List[np.ndarray]) -> List[Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+            with detect_lock:
+                if hasattr(detector, 'detect_batch'):
+                    return detector.detect_batch(batch)
+                return [detector.detect(frame) for frame in batch]
+        
+        # One worker per stage: keyframe detection and grayscale conversion
+        if self.pipelined:
+            det_pool = ThreadPoolExecutor(max_workers=1)
+            gray_pool = ThreadPoolExecutor(max_workers=1)
+        else:
+            det_pool = gray_pool = _InlineExecutor()
+        
+        keyframe_dets = {}
+        gray_frames = None
+        try:
+            # Keyframes are known up front: detect them ahead on a worker,
+            # keyframe_batch frames per detector call
+            keyframes = [i for i in range(n_frames) if i == 0 or i % detector_interval == 0]
+            for start in range(0, len(keyframes), self.keyframe_batch):
+                chunk = keyframes[start:start + self.keyframe_batch]
+                future = det_pool.submit(detect_batch, [frames[i] for i in chunk])
+                keyframe_dets.update((i, (future, k)) for k, i in enumerate(chunk))
             
-            # Keyframe: run detector
-            if i == 0 or i % detector_interval == 0:
-                bboxes, scores, class_ids = detector.detect(frame)
-                all_detections.append((bboxes, scores, class_ids))
-                self.logger.debug(f"Frame {i}: Keyframe detection - {len(bboxes)} objects")
-                prev_gray = gray
-                continue
+            # Gray is only used by non-keyframes and by the frame before one
+            is_keyframe = np.zeros(n_frames + 1, dtype=bool)
+            is_keyframe[keyframes] = True
+            is_keyframe[n_frames] = True
+            gray_needed = ~is_keyframe[:-1] | ~is_keyframe[1:]
+            gray_frames = self._iter_gray(frames, gray_pool, gray_needed)
             
-            # Non-keyframe: propagate from previous frame
-            if prev_gray is not None and len(all_detections[-1][0]) > 0:
-                # Compute optical flow
-                flow = self._compute_optical_flow(prev_gray, gray)
+            for i, frame in enumerate(frames):
+                # Grayscale for optical flow (converted ahead on a worker)
+                gray = next(gray_frames)
                 
-                # Propagate bounding boxes
-                prev_bboxes, prev_scores, prev_class_ids = all_detections[-1]
-                prop_bboxes = self._propagate_bboxes(prev_bboxes, flow)
+                # Keyframe: run detector
+                if i in keyframe_dets:
+                    future, k = keyframe_dets.pop(i)
+                    bboxes, scores, class_ids = future.result()[k]
+                    all_detections.append((bboxes, scores, class_ids))
+                    self.logger.debug("Frame %d: Keyframe detection - %d objects", i, len(bboxes))
+                    prev_gray = gray
+                    continue
                 
-                # Check if re-detection needed
-                if self._need_redetection(flow, prop_bboxes):
-                    self.logger.debug(f"Frame {i}: Re-detection triggered")
-                    bboxes, scores, class_ids = detector.detect(frame)
+                # Non-keyframe: propagate from previous frame
+                if prev_gray is not None and len(all_detections[-1][0]) > 0:
+                    prev_bboxes, prev_scores, prev_class_ids = all_detections[-1]
+                    
+                    # Sparse LK on the boxes themselves; dense flow otherwise
+                    # or when LK loses every point of a box
+                    sparse = None
+                    if self.optical_flow_method == 'lucas_kanade':
+                        sparse = self._propagate_bboxes_lk(prev_gray, gray, prev_bboxes)
+                    
+                    if sparse is not None:
+                        prop_bboxes, max_flow_sq = sparse
+                        redetect = self._need_redetection(
+                            None, prop_bboxes, max_flow_sq=max_flow_sq, frame_shape=gray.shape[:2]
+                        )
+                    else:
+                        # Compute optical flow
+                        flow = self._compute_optical_flow(prev_gray, gray)
+                        
+                        # Propagate bounding boxes
+                        prop_bboxes = self._propagate_bboxes(prev_bboxes, flow)
+                        redetect = self._need_redetection(flow, prop_bboxes)
+                    
+                    # Check if re-detection needed
+                    if redetect:
+                        self.logger.debug("Frame %d: Re-detection triggered", i)
+                        bboxes, scores, class_ids = detect(frame)
+                    else:
+                        # Use propagated bboxes
+                        bboxes = prop_bboxes
+                        scores = prev_scores.copy()  # Keep previous scores
+                        class_ids = prev_class_ids.copy()
+                        self.logger.debug("Frame %d: Propagated - %d objects", i, len(bboxes))
+                    
+                    all_detections.append((bboxes, scores, class_ids))
                 else:
-                    # Use propagated bboxes
-                    bboxes = prop_bboxes
-                    scores = prev_scores.copy()  # Keep previous scores
-                    class_ids = prev_class_ids.copy()
-                    self.logger.debug(f"Frame {i}: Propagated - {len(bboxes)} objects")
+                    # No previous detections, run detector
+                    bboxes, scores, class_ids = detect(frame)
+                    all_detections.append((bboxes, scores, class_ids))
+                    self.logger.debug("Frame %d: No prev detections - running detector", i)
                 
-                all_detections.append((bboxes, scores, class_ids))
-            else:
-                # No previous detections, run detector
-                bboxes, scores, class_ids = detector.detect(frame)
-                all_detections.append((bboxes, scores, class_ids))
-                self.logger.debug(f"Frame {i}: No prev detections - running detector")
-            
-            prev_gray = gray
+                prev_gray = gray
+        finally:
+            # Drop work queued ahead if we stopped early (cancel_futures
+            # needs Python 3.9)
+            for future, _ in keyframe_dets.values():
+                future.cancel()
+            if gray_frames is not None:
+                gray_frames.close()
+            det_pool.shutdown()
+            gray_pool.shutdown()
         
         # Statistics
         n_detections = sum(1 for i in range(n_frames) if i == 0 or i % detector_interval == 0)
         n_propagations = n_frames - n_detections
         self.logger.info(f"Propagation complete: {n_detections} detections, {n_propagations} propagations")
         
-        return all_detections
+        return SequenceDetections.from_frames(all_detections)
+    
+    def _iter_gray(self,
+                   frames: List[np.ndarray],
+                   pool,
+                   needed: np.ndarray) -> Iterator[Optional[np.ndarray]]:
+        """
+        Yield grayscale frames in order, converting up to gray_lookahead
+        frames ahead on the pool (cvtColor releases the GIL)
+        
+        Args:
+            frames: List of frames (BGR format)
+            pool: Executor used for the conversions
+            needed: Per-frame flag, frames without it are not converted
+            
+        Yields:
+            Grayscale frame for each input frame (None if not needed)
+        """
+        pending = deque()
+        next_idx = 0
+        try:
+            for _ in range(len(frames)):
+                while next_idx < len(frames) and len(pending) <= self.gray_lookahead:
+                    if needed[next_idx]:
+                        pending.append(pool.submit(cv2.cvtColor, frames[next_idx],
+                                                   cv2.COLOR_BGR2GRAY))
+                    else:
+                        pending.append(None)
+                    next_idx += 1
+                future = pending.popleft()
+                yield future.result() if future is not None else None
+        finally:
+            # Closed early: cancel the conversions queued ahead
+            for future in pending:
+                if future is not None:
+                    future.cancel()
     
     def _compute_optical_flow(self, prev_gray: np.ndarray, gray: np.ndarray) -> np.ndarray:
         """
@@ -161,23 +406,112 @@ class TemporalPropagator:
         Returns:
             Flow field (H, W, 2) - dx, dy for each pixel
         """
-        if self.optical_flow_method == 'farneback':
-            flow = cv2.calcOpticalFlowFarneback(
-                prev_gray, gray,
-                None,
-                self.flow_params['pyr_scale'],
-                self.flow_params['levels'],
-                self.flow_params['winsize'],
-                self.flow_params['iterations'],
-                self.flow_params['poly_n'],
-                self.flow_params['poly_sigma'],
-                self.flow_params['flags']
+        # Reuse one output buffer; flow is only needed until the next frame
+        h, w = gray.shape[:2]
+        if self._flow_buf is None or self._flow_buf.shape[:2] != (h, w):
+            self._flow_buf = np.empty((h, w, 2), dtype=np.float32)
+        
+        if self.flow_scale < 1.0:
+            small_prev = self._downscale(prev_gray)
+            small = self._downscale(gray)
+            flow = self._dense_flow(small_prev, small, None)
+            
+            # Back to frame resolution and pixel units
+            cv2.resize(flow, (w, h), dst=self._flow_buf, interpolation=cv2.INTER_LINEAR)
+            self._flow_buf *= 1.0 / self.flow_scale
+            return self._flow_buf
+        
+        return self._dense_flow(prev_gray, gray, self._flow_buf)
+    
+    def _downscale(self, gray: np.ndarray) -> np.ndarray:
+        """
+        Downscale a gray frame by flow_scale, reusing the last result (each
+        frame is the current frame once and the previous frame once)
+        
+        Args:
+            gray: Grayscale frame
+            
+        Returns:
+            Downscaled grayscale frame
+        """
+        if self._last_small is not None and self._last_small[0] is gray:
+            return self._last_small[1]
+        small = cv2.resize(gray, None, fx=self.flow_scale, fy=self.flow_scale,
+                           interpolation=cv2.INTER_AREA)
+        self._last_small = (gray, small)
+        return small
+    
+    def _dense_flow(self,
+                    prev_gray: np.ndarray,
+                    gray: np.ndarray,
+                    out: Optional[np.ndarray]) -> np.ndarray:
+        """
+        Dense Farneback flow between two frames at their own resolution
+        
+        Args:
+            prev_gray: Previous frame (grayscale)
+            gray: Current frame (grayscale)
+            out: Optional preallocated (H, W, 2) float32 output
+            
+        Returns:
+            Flow field (H, W, 2) - dx, dy for each pixel
+        """
+        return self._flow_fn(prev_gray, gray, out)
+    
+    @staticmethod
+    def _cuda_available() -> bool:
+        """Check whether OpenCV has CUDA support and a usable device"""
+        try:
+            return cv2.cuda.getCudaEnabledDeviceCount() > 0
+        except (AttributeError, cv2.error):
+            return False
+    
+    def _farneback_cuda(self,
+                        prev_gray: np.ndarray,
+                        gray: np.ndarray,
+                        out: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Farneback optical flow on the GPU
+        
+        Consecutive calls pass the previous current frame as prev_gray, so the
+        device copy of it is reused and only the new frame is uploaded.
+        
+        Args:
+            prev_gray: Previous frame (grayscale)
+            gray: Current frame (grayscale)
+            out: Optional preallocated (H, W, 2) float32 host output
+            
+        Returns:
+            Flow field (H, W, 2) - dx, dy for each pixel
+        """
+        if self._cuda_flow is None:
+            p = self.flow_params
+            self._cuda_flow = cv2.cuda_FarnebackOpticalFlow.create(
+                numLevels=p['levels'],
+                pyrScale=p['pyr_scale'],
+                fastPyramids=False,
+                winSize=p['winsize'],
+                numIters=p['iterations'],
+                polyN=p['poly_n'],
+                polySigma=p['poly_sigma'],
+                flags=p['flags']
             )
-        else:
-            # Fallback to simple dense flow
-            flow = cv2.calcOpticalFlowFarneback(prev_gray, gray, None, 0.5, 3, 15, 3, 5, 1.2, 0)
+            # Device buffers are reused across calls
+            self._gpu_gray = [cv2.cuda_GpuMat(), cv2.cuda_GpuMat()]
+            self._gpu_flow = cv2.cuda_GpuMat()
         
-        return flow
+        if self._gpu_last is not prev_gray:
+            self._gpu_gray[1].upload(prev_gray)
+        
+        # Rotate the ring: last frame becomes prev, upload the new one
+        self._gpu_gray.reverse()
+        g_prev, g_cur = self._gpu_gray
+        g_cur.upload(gray)
+        self._gpu_last = gray
+        
+        self._gpu_flow = self._cuda_flow.calc(g_prev, g_cur, self._gpu_flow)
+        
+        return self._gpu_flow.download(out) if out is not None else self._gpu_flow.download()
     
     def _propagate_bboxes(self, bboxes: np.ndarray, flow: np.ndarray) -> np.ndarray:
         """
@@ -193,67 +527,145 @@ class TemporalPropagator:
         if len(bboxes) == 0:
             return bboxes
         
-        prop_bboxes = []
         h, w = flow.shape[:2]
+        bboxes = np.asarray(bboxes)
         
-        for bbox in bboxes:
-            x1, y1, x2, y2 = bbox
-            
-            # Get flow in bbox region (sample center and corners)
-            cx, cy = int((x1 + x2) / 2), int((y1 + y2) / 2)
-            
-            # Ensure coordinates are within bounds
-            cx = np.clip(cx, 0, w - 1)
-            cy = np.clip(cy, 0, h - 1)
-            
-            # Sample flow at center
-            dx, dy = flow[cy, cx]
-            
-            # Apply flow to bbox
-            new_x1 = x1 + dx
-            new_y1 = y1 + dy
-            new_x2 = x2 + dx
-            new_y2 = y2 + dy
+        # Sample flow on a k x k grid inside each bbox (clipped to the frame);
+        # the median is robust to occlusion / aperture outliers
+        fx, fy = self._sample_fractions
+        xs = bboxes[:, 0:1] * (1.0 - fx) + bboxes[:, 2:3] * fx  # (N, k)
+        ys = bboxes[:, 1:2] * (1.0 - fy) + bboxes[:, 3:4] * fy
+        cx = np.clip(xs.astype(np.int32), 0, w - 1)
+        cy = np.clip(ys.astype(np.int32), 0, h - 1)
+        samples = flow[cy[:, :, None], cx[:, None, :]]  # (N, k, k, 2)
+        d = np.median(samples.reshape(len(bboxes), -1, 2), axis=1)  # (N, 2) dx, dy
+        
+        # Apply flow to bboxes and clip to frame bounds
+        prop_bboxes = bboxes + d[:, [0, 1, 0, 1]]
+        np.clip(prop_bboxes, 0, [w, h, w, h], out=prop_bboxes)
+        
+        return prop_bboxes
+    
+    def _propagate_bboxes_lk(self,
+                             prev_gray: np.ndarray,
+                             gray: np.ndarray,
+                             bboxes: np.ndarray) -> Optional[Tuple[np.ndarray, float]]:
+        """
+        Propagate bounding boxes with sparse Lucas-Kanade on corners inside them
+        
+        Corners are found per bbox, then tracked together in a single
+        calcOpticalFlowPyrLK call; each bbox moves by the median displacement
+        of its tracked points. Cost scales with the number of points, not
+        with the frame size.
+        
+        Args:
+            prev_gray: Previous frame (grayscale)
+            gray: Current frame (grayscale)
+            bboxes: Bounding boxes (N, 4) [x1, y1, x2, y2]
             
-            # Clip to frame bounds
-            new_x1 = np.clip(new_x1, 0, w)
-            new_y1 = np.clip(new_y1, 0, h)
-            new_x2 = np.clip(new_x2, 0, w)
-            new_y2 = np.clip(new_y2, 0, h)
+        Returns:
+            Tuple of (propagated bboxes (N, 4), peak squared displacement),
+            or None if some bbox has no trackable point
+        """
+        h, w = gray.shape[:2]
+        bboxes = np.asarray(bboxes)
+        boxes_int = np.clip(bboxes, 0, [w, h, w, h]).astype(int)
+        
+        points = []
+        n_points = []
+        for x1, y1, x2, y2 in boxes_int:
+            corners = None
+            if x2 - x1 >= 2 and y2 - y1 >= 2:
+                corners = cv2.goodFeaturesToTrack(
+                    prev_gray[y1:y2, x1:x2], maxCorners=10, qualityLevel=0.01, minDistance=5
+                )
+            if corners is None:
+                return None
+            points.append(corners.reshape(-1, 2) + (x1, y1))
+            n_points.append(len(corners))
+        
+        p0 = np.concatenate(points).astype(np.float32).reshape(-1, 1, 2)
+        p1, status, _ = self._lk_fn(prev_gray, gray, p0, None)
+        
+        disp = (p1 - p0).reshape(-1, 2)
+        tracked = status.ravel() == 1
+        splits = np.cumsum(n_points)[:-1]
+        d = np.empty((len(bboxes), 2))
+        for k, (box_disp, box_tracked) in enumerate(zip(np.split(disp, splits),
+                                                        np.split(tracked, splits))):
+            if not box_tracked.any():
+                return None
+            d[k] = np.median(box_disp[box_tracked], axis=0)
+        
+        prop_bboxes = bboxes + d[:, [0, 1, 0, 1]]
+        np.clip(prop_bboxes, 0, [w, h, w, h], out=prop_bboxes)
+        
+        max_flow_sq = float(np.max(np.sum(disp[tracked] ** 2, axis=1)))
+        
+        return prop_bboxes, max_flow_sq
+    
+    def _max_flow_sq(self, flow: np.ndarray, limit_sq: Optional[float] = None) -> float:
+        """
+        Peak squared flow magnitude (no sqrt needed for the threshold test)
+        
+        Args:
+            flow: Optical flow field (H, W, 2)
+            limit_sq: Stop at the first row band whose peak exceeds this
             
-            prop_bboxes.append([new_x1, new_y1, new_x2, new_y2])
+        Returns:
+            Maximum of dx^2 + dy^2 over the frame, or the first band peak
+            above limit_sq
+        """
+        # cv2.magnitude and minMaxLoc are SIMD and run on OpenCV's thread pool;
+        # cache-sized row bands also let large motion exit early
+        if self._mag_buf is None or self._mag_buf.shape != flow.shape[:2]:
+            self._mag_buf = np.empty(flow.shape[:2], dtype=np.float32)
         
-        return np.array(prop_bboxes)
+        peak_sq = 0.0
+        for r in range(0, flow.shape[0], _FLOW_BAND_ROWS):
+            band = flow[r:r + _FLOW_BAND_ROWS]
+            mag = cv2.magnitude(band[:, :, 0], band[:, :, 1],
+                                magnitude=self._mag_buf[r:r + _FLOW_BAND_ROWS])
+            peak_sq = max(peak_sq, cv2.minMaxLoc(mag)[1] ** 2)
+            if limit_sq is not None and peak_sq > limit_sq:
+                break
+        return peak_sq
     
-    def _need_redetection(self, flow: np.ndarray, bboxes: np.ndarray) -> bool:
+    def _need_redetection(self,
+                          flow: Optional[np.ndarray],
+                          bboxes: np.ndarray,
+                          max_flow_sq: Optional[float] = None,
+                          frame_shape: Optional[Tuple[int, int]] = None) -> bool:
         """
         Determine if re-detection is needed based on flow magnitude
         
         Args:
-            flow: Optical flow field
+            flow: Optical flow field (None when max_flow_sq is given)
             bboxes: Current bounding boxes
+            max_flow_sq: Precomputed peak squared displacement (sparse flow)
+            frame_shape: Frame (H, W), required when flow is None
             
         Returns:
             True if re-detection needed
         """
-        # Compute average flow magnitude
-        flow_mag = np.sqrt(flow[:, :, 0]**2 + flow[:, :, 1]**2)
-        avg_flow = np.mean(flow_mag)
-        max_flow = np.max(flow_mag)
+        if max_flow_sq is None:
+            max_flow_sq = self._max_flow_sq(flow, self._redetection_threshold_sq)
         
         # Trigger re-detection if motion is too large
-        if max_flow > self.redetection_threshold:
-            self.logger.debug(f"Re-detection: max_flow={max_flow:.1f} > threshold={self.redetection_threshold}")
+        if max_flow_sq > self._redetection_threshold_sq:
+            if self.logger.isEnabledFor(logging.DEBUG):
+                self.logger.debug("Re-detection: max_flow=%.1f > threshold=%s",
+                                  np.sqrt(max_flow_sq), self.redetection_threshold)
             return True
         
         # Check if any bbox goes out of bounds significantly
         if len(bboxes) > 0:
-            h, w = flow.shape[:2]
+            h, w = flow.shape[:2] if flow is not None else frame_shape
             for bbox in bboxes:
                 x1, y1, x2, y2 = bbox
                 # Check if bbox is too small or malformed
                 if x2 - x1 < 10 or y2 - y1 < 10:
-                    self.logger.debug(f"Re-detection: bbox too small")
+                    self.logger.debug("Re-detection: bbox too small")
                     return True
                 # Check if bbox is mostly out of frame
                 if x1 < 0 or y1 < 0 or x2 > w or y2 > h:
@@ -262,7 +674,7 @@ class TemporalPropagator:
                         abs(min(0, y1)) + abs(max(0, y2 - h))
                     ) / max(x2 - x1, y2 - y1)
                     if out_of_bound_ratio > 0.3:
-                        self.logger.debug(f"Re-detection: bbox out of bounds")
+                        self.logger.debug("Re-detection: bbox out of bounds")
                         return True
         
         return False
@@ -303,12 +715,12 @@ class TemporalPropagator:
         
         return vis
     
-    def get_statistics(self, all_detections: List[Tuple], keyframe_interval: int) -> Dict:
+    def get_statistics(self, all_detections, keyframe_interval: int) -> Dict:
         """
         Get propagation statistics
         
         Args:
-            all_detections: List of detections for all frames
+            all_detections: SequenceDetections or list of detections for all frames
             keyframe_interval: Keyframe interval used
             
         Returns:
@@ -319,8 +731,11 @@ class TemporalPropagator:
         n_propagations = n_frames - n_keyframes
         
         # Count detections per frame
-        detection_counts = [len(det[0]) for det in all_detections]
-        avg_detections = np.mean(detection_counts) if detection_counts else 0
+        if isinstance(all_detections, SequenceDetections):
+            detection_counts = all_detections.counts
+        else:
+            detection_counts = np.array([len(det[0]) for det in all_detections])
+        avg_detections = np.mean(detection_counts) if n_frames > 0 else 0
         
         stats = {
             'total_frames': n_frames,
@@ -331,3 +746,28 @@ class TemporalPropagator:
         }
         
         return stats
+
+
+class _InlineExecutor:
+    """
+    Executor stand-in that runs submitted calls immediately (pipelining off)
+    """
+    
+    def shutdown(self, wait: bool = True) -> None:
+        pass
+    
+    def submit(self, fn, *args, **kwargs) -> '_DoneFuture':
+        return _DoneFuture(fn(*args, **kwargs))
+
+
+class _DoneFuture:
+    """Already-completed future holding a result"""
+    
+    def __init__(self, result):
+        self._result = result
+    
+    def result(self):
+        return self._result
+    
+    def cancel(self) -> bool:
+        return False
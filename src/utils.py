@@ -9,6 +9,81 @@ import numpy as np
 from pathlib import Path
 from typing import Dict, List, Tuple, Optional, Any
 
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+
+if NUMBA_AVAILABLE:
+    @njit(parallel=True, fastmath=True, cache=True)
+    def _texture_kernel(gray, mask, has_mask):
+        """
+        Gradient magnitude sum (np.gradient semantics) in one parallel pass
+        
+        Args:
+            gray: Grayscale frame (H, W)
+            mask: ROI weights (H, W), ignored unless has_mask
+            has_mask: Whether to weight by mask
+            
+        Returns:
+            Tuple of (weighted magnitude sum, number of counted pixels)
+        """
+        h, w = gray.shape
+        row_sums = np.zeros(h)
+        row_counts = np.zeros(h, dtype=np.int64)
+        for i in prange(h):
+            # Central differences inside, one-sided at the borders
+            i0 = max(i - 1, 0)
+            i1 = min(i + 1, h - 1)
+            dy_scale = 1.0 / (i1 - i0)
+            acc = 0.0
+            n = 0
+            for j in range(w):
+                weight = 1.0
+                if has_mask:
+                    weight = np.float64(mask[i, j])
+                    if weight > 0:
+                        n += 1
+                    elif weight == 0:
+                        continue
+                else:
+                    n += 1
+                j0 = max(j - 1, 0)
+                j1 = min(j + 1, w - 1)
+                gx = (np.float32(gray[i, j1]) - np.float32(gray[i, j0])) / (j1 - j0)
+                gy = (np.float32(gray[i1, j]) - np.float32(gray[i0, j])) * dy_scale
+                acc += np.sqrt(gx * gx + gy * gy) * weight
+            row_sums[i] = acc
+            row_counts[i] = n
+        return row_sums.sum(), row_counts.sum()
+
+    @njit(parallel=True, cache=True)
+    def _ctu_level_counts(roi_map, ctu_size, n_ctu_h, n_ctu_w):
+        """
+        Per-CTU pixel count of each ROI level (full CTUs only)
+        
+        Args:
+            roi_map: ROI map (H, W) with levels 0, 1, 2
+            ctu_size: CTU size
+            n_ctu_h: Number of CTU rows
+            n_ctu_w: Number of CTU columns
+            
+        Returns:
+            Counts (n_ctu_h, n_ctu_w, 3); pixels with other levels are not
+            counted, as in the NumPy path
+        """
+        counts = np.zeros((n_ctu_h, n_ctu_w, 3), dtype=np.int64)
+        for ti in prange(n_ctu_h):
+            for y in range(ti * ctu_size, (ti + 1) * ctu_size):
+                for tj in range(n_ctu_w):
+                    for x in range(tj * ctu_size, (tj + 1) * ctu_size):
+                        level = roi_map[y, x]
+                        if 0 <= level < 3:
+                            counts[ti, tj, level] += 1
+        return counts
+
 
 def load_config(config_path: str) -> Dict[str, Any]:
     """
@@ -147,6 +222,34 @@ def bbox_iou(bbox1: np.ndarray, bbox2: np.ndarray) -> float:
     return intersection / union if union > 0 else 0
 
 
+def bbox_iou_batch(bboxes1: np.ndarray, bboxes2: np.ndarray) -> np.ndarray:
+    """
+    Calculate pairwise IoU between two sets of bounding boxes
+    
+    Args:
+        bboxes1: Bounding boxes (N, 4) [x1, y1, x2, y2]
+        bboxes2: Bounding boxes (M, 4) [x1, y1, x2, y2]
+        
+    Returns:
+        IoU matrix (N, M)
+    """
+    a = np.asarray(bboxes1, dtype=np.float64).reshape(-1, 4)
+    b = np.asarray(bboxes2, dtype=np.float64).reshape(-1, 4)
+    
+    top_left = np.maximum(a[:, None, :2], b[None, :, :2])
+    bottom_right = np.minimum(a[:, None, 2:], b[None, :, 2:])
+    wh = np.clip(bottom_right - top_left, 0, None)
+    intersection = wh[..., 0] * wh[..., 1]
+    
+    area1 = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area2 = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    union = area1[:, None] + area2[None, :] - intersection
+    
+    iou = np.zeros_like(union)
+    np.divide(intersection, union, out=iou, where=union > 0)
+    return iou
+
+
 def calculate_texture_complexity(frame: np.ndarray, 
                                  roi_mask: Optional[np.ndarray] = None) -> float:
     """
@@ -159,12 +262,29 @@ def calculate_texture_complexity(frame: np.ndarray,
     Returns:
         Texture complexity score [0, 1]
     """
-    # Convert to grayscale if needed
+    import cv2
+    
+    # Convert to grayscale if needed (SIMD luma, stays uint8)
     if len(frame.shape) == 3:
-        gray = np.mean(frame, axis=2)
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
     else:
         gray = frame
     
+    # The kernel does not bounds-check the mask
+    if roi_mask is not None and roi_mask.shape != gray.shape:
+        raise ValueError(f"ROI mask shape {roi_mask.shape} does not match "
+                         f"frame shape {gray.shape}")
+    
+    h, w = gray.shape[:2]
+    if NUMBA_AVAILABLE and h > 1 and w > 1:
+        has_mask = roi_mask is not None
+        mask = roi_mask if has_mask else np.empty((1, 1))
+        total, n_pixels = _texture_kernel(gray, mask, has_mask)
+        complexity = total / (n_pixels * 255.0) if n_pixels > 0 else 0
+        return min(1.0, complexity)
+    
+    gray = gray.astype(np.float32)
+    
     # Calculate gradients
     gx = np.gradient(gray, axis=1)
     gy = np.gradient(gray, axis=0)
@@ -232,20 +352,20 @@ def resize_maintain_aspect(frame: np.ndarray,
     new_w = int(w * scale)
     new_h = int(h * scale)
     
-    # Resize
-    resized = cv2.resize(frame, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
-    
-    # Pad to target size
-    pad_w = target_w - new_w
-    pad_h = target_h - new_h
+    if new_w == target_w and new_h == target_h:
+        return cv2.resize(frame, (new_w, new_h), interpolation=cv2.INTER_LINEAR), (scale, scale)
     
-    if pad_w > 0 or pad_h > 0:
-        resized = cv2.copyMakeBorder(
-            resized, 0, pad_h, 0, pad_w,
-            cv2.BORDER_CONSTANT, value=(0, 0, 0)
-        )
+    # Resize straight into the top-left of a zero-padded canvas
+    # (one pass over the output instead of resize + copyMakeBorder)
+    # (OpenCV drops a singleton channel axis, so mirror that)
+    channels = frame.shape[2:] if frame.ndim == 3 and frame.shape[2] > 1 else ()
+    padded = np.zeros((target_h, target_w) + channels, dtype=frame.dtype)
+    region = padded[:new_h, :new_w]
+    resized = cv2.resize(frame, (new_w, new_h), dst=region, interpolation=cv2.INTER_LINEAR)
+    if resized is not region:
+        region[...] = resized
     
-    return resized, (scale, scale)
+    return padded, (scale, scale)
 
 
 def scale_bboxes(bboxes: np.ndarray, 
@@ -325,15 +445,18 @@ def calculate_ctu_statistics(roi_map: np.ndarray,
     n_ctu_w = w // ctu_size
     n_total = n_ctu_h * n_ctu_w
     
-    # Count CTUs by level
-    level_counts = {0: 0, 1: 0, 2: 0}
+    # Pixel count of each level per CTU
+    if NUMBA_AVAILABLE:
+        ctu_counts = _ctu_level_counts(roi_map, ctu_size, n_ctu_h, n_ctu_w)
+    else:
+        tiles = roi_map[:n_ctu_h * ctu_size, :n_ctu_w * ctu_size].reshape(
+            n_ctu_h, ctu_size, n_ctu_w, ctu_size
+        )
+        ctu_counts = np.stack([(tiles == level).sum(axis=(1, 3)) for level in range(3)], axis=-1)
     
-    for i in range(n_ctu_h):
-        for j in range(n_ctu_w):
-            ctu_roi = roi_map[i*ctu_size:(i+1)*ctu_size, 
-                             j*ctu_size:(j+1)*ctu_size]
-            dominant_level = np.argmax(np.bincount(ctu_roi.flatten(), minlength=3))
-            level_counts[dominant_level] += 1
+    # Count CTUs by dominant level (ties go to the lower level)
+    dominant = np.bincount(ctu_counts.reshape(-1, 3).argmax(axis=1), minlength=3)
+    level_counts = {0: int(dominant[0]), 1: int(dominant[1]), 2: int(dominant[2])}
     
     return {
         'total_ctus': n_total,
@@ -7,11 +7,162 @@ Reference: https://github.com/fraunhoferhhi/vvenc
 import subprocess
 import os
 import re
+import shutil
+import threading
 import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Dict, Optional, List, Tuple
 import logging
 import tempfile
+import numpy as np
+
+
+# Resolved encoder executable per software name, probed once per process
+_VVENC_PATH_CACHE: Dict[str, str] = {}
+# vvencapp --version output per executable path
+_VVENC_VERSION_CACHE: Dict[str, str] = {}
+
+# VVenC output patterns, compiled once at import
+_BITRATE_RES = [re.compile(p, re.IGNORECASE) for p in (
+    r'avg_bitrate[=\s]+([\d.]+)\s+kbps',  # VVenC: avg_bitrate= 29914.88 kbps
+    r'Bitrate\s+([\d.]+)',  # VVenC table: Bitrate     Y-PSNR
+    r'Total Bitrate:\s+([\d.]+)\s+kbps',
+    r'bitrate.*?:\s+([\d.]+)\s+kbps',
+    r'avg bitrate\s+([\d.]+)\s+kbit/s',
+)]
+# PSNR - VVenC outputs in table format after "Y-PSNR    U-PSNR    V-PSNR"
+# Example: "          50    a   29914.8816   42.5487   50.7075   50.9686   43.9565"
+_PSNR_HEADER_RE = re.compile(r'Y-PSNR\s+U-PSNR\s+V-PSNR', re.IGNORECASE)
+_PSNR_ROW_RE = re.compile(r'[\d]+\s+[a-z]?\s+([\d.]+)\s+([\d.]+)\s+([\d.]+)\s+([\d.]+)', re.IGNORECASE)
+_PSNR_RES = [re.compile(p, re.IGNORECASE) for p in (
+    # Standard format
+    r'Y-PSNR[:\s]+([\d.]+)\s+U-PSNR[:\s]+([\d.]+)\s+V-PSNR[:\s]+([\d.]+)',
+    r'PSNR.*?Y[:\s]+([\d.]+)\s+U[:\s]+([\d.]+)\s+V[:\s]+([\d.]+)',
+    r'Y\s+([\d.]+)\s+dB.*?U\s+([\d.]+)\s+dB.*?V\s+([\d.]+)\s+dB',
+)]
+# Same patterns spanning lines, for text whose Y/U/V values are split over lines
+_PSNR_MULTILINE_RES = [re.compile(p.pattern, re.IGNORECASE | re.DOTALL) for p in _PSNR_RES]
+_FRAMES_RES = [re.compile(p, re.IGNORECASE) for p in (
+    r'(\d+)\s+frames',
+    r'frames.*?:\s*(\d+)',
+    r'encoded\s+(\d+)\s+frames',
+)]
+# QP map temp files go to tmpfs when available (no disk write per encode)
+_QP_MAP_TMP_DIR = '/dev/shm' if os.path.isdir('/dev/shm') else None
+
+# Encoder output lines kept for error / debug messages
+_OUTPUT_TAIL_LINES = 64
+
+_VERSION_RE = re.compile(r'vvencapp:\s+([\d.]+)')
+
+
+class _StatsParser:
+    """
+    Single-pass, line-by-line VVenC output parser
+    
+    For each statistic the first match of the highest-priority pattern wins,
+    as with searching the whole text pattern by pattern. Lines are only run
+    through a regex when a cheap substring check says they can match.
+    """
+    
+    def __init__(self):
+        # (rank, value); rank is the matching pattern's priority, lower wins
+        self.bitrate = (len(_BITRATE_RES) + 1, 0.0)  # rank len = table
+        self.psnr = (len(_PSNR_RES) + 1, (0.0, 0.0, 0.0))  # rank 0 = table
+        self.frames = (len(_FRAMES_RES), 0)
+        self._psnr_table = False  # Y-PSNR U-PSNR V-PSNR header seen
+        self._table_cols = 4  # Bitrate + Y/U/V (+ YUV) PSNR columns
+    
+    def feed(self, line: str) -> None:
+        """
+        Parse one line of output
+        
+        Args:
+            line: Output line
+        """
+        low = line.lower()
+        
+        if self.bitrate[0] > 0 and 'bitrate' in low:
+            for rank, pattern in enumerate(_BITRATE_RES[:self.bitrate[0]]):
+                match = pattern.search(line)
+                if match:
+                    self.bitrate = (rank, float(match.group(1)))
+                    break
+        
+        if self.psnr[0] > 0:
+            # Table row: first row after the header; split the trailing
+            # columns, regex only for rows that do not split cleanly
+            row = None
+            if self._psnr_table:
+                row = self._split_row(line)
+                if row is None:
+                    match = _PSNR_ROW_RE.search(line)
+                    row = [float(g) for g in match.groups()] if match else None
+            else:
+                header = _PSNR_HEADER_RE.search(line)
+                if header:
+                    self._psnr_table = True
+                    self._table_cols = 5 if 'yuv-psnr' in low else 4
+                    match = _PSNR_ROW_RE.search(line, header.end())
+                    row = [float(g) for g in match.groups()] if match else None
+            if row is not None:
+                self.psnr = (0, tuple(row[1:4]))
+                # Table bitrate only when no bitrate line was printed
+                if self.bitrate[0] > len(_BITRATE_RES):
+                    self.bitrate = (len(_BITRATE_RES), row[0])
+            elif 'psnr' in low or 'db' in low:
+                for rank, pattern in enumerate(_PSNR_RES[:self.psnr[0] - 1], 1):
+                    match = pattern.search(line)
+                    if match:
+                        self.psnr = (rank, tuple(float(g) for g in match.groups()))
+                        break
+        
+        if self.frames[0] > 0 and 'frames' in low:
+            for rank, pattern in enumerate(_FRAMES_RES[:self.frames[0]]):
+                match = pattern.search(line)
+                if match:
+                    self.frames = (rank, int(match.group(1)))
+                    break
+    
+    def finish(self, text: str) -> None:
+        """
+        Resolve PSNR values whose fallback patterns span several lines
+        
+        Without a summary table, the fallback patterns are searched across
+        line breaks, as a whole-text search would. Only patterns ranked at
+        or above the best per-line match are tried.
+        
+        Args:
+            text: Output text to search (the whole output, or its tail)
+        """
+        if self.psnr[0] == 0 or not text:
+            return
+        for rank, pattern in enumerate(_PSNR_MULTILINE_RES[:self.psnr[0]], 1):
+            match = pattern.search(text)
+            if match:
+                self.psnr = (rank, tuple(float(g) for g in match.groups()))
+                break
+    
+    def _split_row(self, line: str) -> Optional[List[float]]:
+        """
+        Split a summary table row ("50  a  29914.88  42.54  50.70  50.96  43.95")
+        
+        Args:
+            line: Output line after the table header
+            
+        Returns:
+            [bitrate, Y, U, V(, YUV)] PSNR values, or None if not a table row
+        """
+        fields = line.split()
+        n = self._table_cols
+        if len(fields) < n + 1:
+            return None
+        try:
+            return [float(v) for v in fields[-n:]]
+        except ValueError:
+            return None
 
 
 class VVCEncoder:
@@ -40,11 +191,19 @@ class VVCEncoder:
         self.gop_size = self.encoder_config.get('gop_size', 16)
         self.intra_period = self.encoder_config.get('intra_period', 32)
         self.frame_rate = self.encoder_config.get('frame_rate', 30)
+        self.verbosity = self.encoder_config.get('verbosity', 3)
         self.ctu_size = self.encoder_config.get('ctu_size', 128)
+        self.binary_qp_map = self.encoder_config.get('binary_qp_map', False)
         
         # Find vvencapp executable
         self.vvenc_path = self._find_vvenc()
         
+        # Arguments that do not change between encodes
+        self._static_cmd_tail = self._build_static_args()
+        
+        self._info = None  # get_encoder_info() result
+        self._warned_qpmap = False  # QP map limitation logged once
+        
         self.logger.info(f"VVC Encoder initialized: {self.vvenc_path}")
     
     def _find_vvenc(self) -> str:
@@ -54,26 +213,29 @@ class VVCEncoder:
         Returns:
             Path to vvencapp
         """
-        # Check common locations
+        cached = _VVENC_PATH_CACHE.get(self.software)
+        if cached is not None:
+            return cached
+        
+        # PATH lookup and common install locations: stat() calls only
         possible_paths = [
-            'vvencapp',  # In PATH
-            'vvencapp.exe',  # Windows in PATH
+            shutil.which('vvencapp'),  # In PATH
+            shutil.which('vvencapp.exe'),  # Windows in PATH
             os.path.expanduser('~/vvenc/build/bin/release-static/vvencapp'),  # Linux
             os.path.expanduser('~/vvenc/build/bin/Release/vvencapp.exe'),  # Windows
             'C:/vvenc/build/bin/Release/vvencapp.exe',  # Windows alternative
         ]
         
         for path in possible_paths:
-            try:
-                result = subprocess.run(
-                    [path, '--version'],
-                    capture_output=True,
-                    timeout=5
-                )
-                if result.returncode == 0:
-                    return path
-            except (subprocess.TimeoutExpired, FileNotFoundError):
+            if path is None or not (os.path.isfile(path) and os.access(path, os.X_OK)):
                 continue
+            # One --version run to make sure the candidate actually starts;
+            # its output is kept for get_encoder_info()
+            version_text = self._probe_vvenc(path)
+            if version_text is not None:
+                _VVENC_VERSION_CACHE[path] = version_text
+                _VVENC_PATH_CACHE[self.software] = path
+                return path
         
         raise FileNotFoundError(
             "vvencapp not found. Please install VVenC:\n"
@@ -82,13 +244,36 @@ class VVCEncoder:
             "Or add vvencapp to PATH"
         )
     
+    @staticmethod
+    def _probe_vvenc(path: str) -> Optional[str]:
+        """
+        Run vvencapp --version
+        
+        Args:
+            path: Path to vvencapp
+            
+        Returns:
+            Version output, or None if the executable does not run
+        """
+        try:
+            result = subprocess.run(
+                [path, '--version'],
+                capture_output=True,
+                text=True,
+                timeout=5
+            )
+        except (subprocess.TimeoutExpired, OSError):
+            return None
+        return result.stdout if result.returncode == 0 else None
+    
     def encode(self,
                input_file: str,
                output_file: str,
                qp: int,
                qp_map: Optional[str] = None,
                width: Optional[int] = None,
-               height: Optional[int] = None) -> Dict:
+               height: Optional[int] = None,
+               threads: Optional[int] = None) -> Dict:
         """
         Encode video with VVenC
         
@@ -99,51 +284,152 @@ class VVCEncoder:
             qp_map: Optional QP map file for ROI encoding
             width: Video width (required for YUV)
             height: Video height (required for YUV)
+            threads: Encoder threads for this call (None = configured threads)
             
         Returns:
             Dictionary with encoding results
         """
         # Build command
         cmd = self._build_command(
-            input_file, output_file, qp, qp_map, width, height
+            input_file, output_file, qp, qp_map, width, height, threads
         )
         
         self.logger.info(f"Encoding: {input_file} -> {output_file}")
-        self.logger.debug(f"Command: {' '.join(cmd)}")
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug("Command: %s", ' '.join(cmd))
         
         # Run encoding
         start_time = time.time()
         
-        try:
-            result = subprocess.run(
-                cmd,
-                capture_output=True,
-                text=True,
-                timeout=10800  # 3 hour timeout (AI mode can be very slow)
-            )
-            
-            encoding_time = time.time() - start_time
+        # Stream the output (VVenC may write to stdout or stderr) through the
+        # parser instead of buffering the whole log; keep only a short tail
+        parser = _StatsParser()
+        tail = deque(maxlen=_OUTPUT_TAIL_LINES)
+        timed_out = threading.Event()
+        
+        with subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                              text=True, bufsize=1) as proc:
+            def kill():
+                timed_out.set()
+                proc.kill()
             
-            if result.returncode != 0:
-                self.logger.error(f"Encoding failed: {result.stderr}")
-                raise RuntimeError(f"VVenC encoding failed: {result.stderr}")
-            
-            # Parse output (VVenC may output to stdout or stderr)
-            output_text = result.stdout if result.stdout else result.stderr
-            stats = self._parse_output(output_text, encoding_time)
-            stats['output_file'] = output_file
-            
-            self.logger.info(
-                f"Encoded: {stats['bitrate']:.2f} kbps, "
-                f"{stats['encoding_time']:.2f}s, "
-                f"PSNR: {stats['psnr_y']:.2f} dB"
-            )
+            # 3 hour timeout (AI mode can be very slow)
+            timer = threading.Timer(10800, kill)
+            timer.start()
+            try:
+                for line in proc.stdout:
+                    parser.feed(line)
+                    tail.append(line)
+                returncode = proc.wait()
+            except BaseException:
+                # Popen.__exit__ would otherwise wait for the encode to finish
+                proc.kill()
+                raise
+            finally:
+                timer.cancel()
+        
+        # Multi-line PSNR fallbacks are resolved on the kept tail
+        parser.finish(''.join(tail))
+        
+        encoding_time = time.time() - start_time
+        
+        if timed_out.is_set():
+            self.logger.error("Encoding timeout (3 hours)")
+            raise RuntimeError("Encoding timeout")
+        
+        if returncode != 0:
+            output_tail = ''.join(tail)
+            self.logger.error(f"Encoding failed: {output_tail}")
+            raise RuntimeError(f"VVenC encoding failed: {output_tail}")
+        
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug("VVenC output (last lines):")
+            self.logger.debug(''.join(tail) if tail else "(empty)")
+        
+        stats = self._collect_stats(parser, encoding_time)
+        stats['output_file'] = output_file
+        
+        self.logger.info(
+            f"Encoded: {stats['bitrate']:.2f} kbps, "
+            f"{stats['encoding_time']:.2f}s, "
+            f"PSNR: {stats['psnr_y']:.2f} dB"
+        )
+        
+        return stats
+    
+    def encode_batch(self, jobs: List[Dict], max_parallel: Optional[int] = None) -> List[Dict]:
+        """
+        Run several encodes concurrently, splitting the cores between them
+        
+        Each vvencapp process gets max(1, cores // max_parallel) threads (at
+        most the configured threads), so encodes that do not saturate the
+        CPU on their own fill it together.
+        
+        Args:
+            jobs: encode() keyword arguments per job (input_file, output_file,
+                qp, and optionally qp_map, width, height, threads)
+            max_parallel: Concurrent encodes (None = cores // configured threads)
             
-            return stats
+        Returns:
+            Encoding results in job order
+        """
+        n_cores = os.cpu_count() or 1
+        if max_parallel is None:
+            max_parallel = max(1, n_cores // max(1, self.threads))
+        max_parallel = max(1, min(max_parallel, len(jobs)))
+        threads = min(self.threads, max(1, n_cores // max_parallel))
+        
+        # A job's own 'threads' overrides the per-job share
+        jobs = [{**job, 'threads': job.get('threads', threads)} for job in jobs]
+        
+        if max_parallel == 1:
+            return [self.encode(**job) for job in jobs]
+        
+        self.logger.info(f"Batch encoding {len(jobs)} jobs: {max_parallel} parallel x {threads} threads")
+        
+        # Threads are enough: each worker just waits on its vvencapp process
+        with ThreadPoolExecutor(max_workers=max_parallel) as pool:
+            futures = [pool.submit(self.encode, **job) for job in jobs]
+            return [future.result() for future in futures]
+    
+    def encode_qp_sweep(self,
+                        input_file: str,
+                        output_pattern: str,
+                        qps: List[int],
+                        width: Optional[int] = None,
+                        height: Optional[int] = None,
+                        max_parallel: Optional[int] = None) -> Dict[int, Dict]:
+        """
+        Encode one input at several QPs, reading it from disk once
+        
+        The input is prefetched into the page cache and the encodes run
+        concurrently, so every vvencapp process reads the same cached pages.
+        
+        Args:
+            input_file: Input video file (YUV or image sequence)
+            output_pattern: Output bitstream path with a {qp} field
+            qps: QP values
+            width: Video width (required for YUV)
+            height: Video height (required for YUV)
+            max_parallel: Concurrent encodes (None = all QPs)
             
-        except subprocess.TimeoutExpired:
-            self.logger.error("Encoding timeout (1 hour)")
-            raise RuntimeError("Encoding timeout")
+        Returns:
+            Encoding results per QP
+        """
+        if hasattr(os, 'posix_fadvise'):
+            fd = os.open(input_file, os.O_RDONLY)
+            try:
+                os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+            finally:
+                os.close(fd)
+        
+        jobs = [
+            dict(input_file=input_file, output_file=output_pattern.format(qp=qp),
+                 qp=qp, width=width, height=height)
+            for qp in qps
+        ]
+        results = self.encode_batch(jobs, max_parallel or len(jobs))
+        return dict(zip(qps, results))
     
     def _build_command(self,
                       input_file: str,
@@ -151,7 +437,8 @@ class VVCEncoder:
                       qp: int,
                       qp_map: Optional[str],
                       width: Optional[int],
-                      height: Optional[int]) -> List[str]:
+                      height: Optional[int],
+                      threads: Optional[int] = None) -> List[str]:
         """
         Build VVenC command line
         
@@ -171,8 +458,39 @@ class VVCEncoder:
         # QP
         cmd.extend(['-q', str(qp)])
         
+        # Frame rate, preset, configuration, threads, verbosity
+        if threads is None or threads == self.threads:
+            cmd.extend(self._static_cmd_tail)
+        else:
+            cmd.extend(self._build_static_args(threads))
+        
+        # QP map (for ROI encoding)
+        # NOTE: VVenC app does not support --qpmap option in command line
+        # CTU-level QP control requires using VVenC library API, not available via CLI
+        # For now, we log this limitation and encode with base QP
+        if qp_map is not None and not self._warned_qpmap:
+            self.logger.warning("QP map provided but VVenC CLI does not support --qpmap option")
+            self.logger.warning("Encoding with uniform base QP instead (CTU-level QP requires library API)")
+            self._warned_qpmap = True
+            # cmd.extend(['--qpmap', qp_map])  # Not supported
+        
+        # NOTE: CTUSize and SEIDecodedPictureHash options may not be available
+        # in all vvencapp versions. They are removed to ensure compatibility.
+        
+        return cmd
+    
+    def _build_static_args(self, threads: Optional[int] = None) -> List[str]:
+        """
+        Build the per-encoder part of the VVenC command line
+        
+        Args:
+            threads: Encoder threads (None = configured threads)
+            
+        Returns:
+            Arguments as list of strings
+        """
         # Frame rate
-        cmd.extend(['-r', str(self.frame_rate)])
+        cmd = ['-r', str(self.frame_rate)]
         
         # Preset
         cmd.extend(['--preset', self.preset])
@@ -189,22 +507,10 @@ class VVCEncoder:
             cmd.extend(['--LowDelay', '1'])
         
         # Threads
-        cmd.extend(['--threads', str(self.threads)])
+        cmd.extend(['--threads', str(self.threads if threads is None else threads)])
         
-        # Verbosity to get statistics output
-        cmd.extend(['--verbosity', '4'])  # Verbose mode to print encoding stats
-        
-        # QP map (for ROI encoding)
-        # NOTE: VVenC app does not support --qpmap option in command line
-        # CTU-level QP control requires using VVenC library API, not available via CLI
-        # For now, we log this limitation and encode with base QP
-        if qp_map and os.path.exists(qp_map):
-            self.logger.warning("QP map provided but VVenC CLI does not support --qpmap option")
-            self.logger.warning("Encoding with uniform base QP instead (CTU-level QP requires library API)")
-            # cmd.extend(['--qpmap', qp_map])  # Not supported
-        
-        # NOTE: CTUSize and SEIDecodedPictureHash options may not be available
-        # in all vvencapp versions. They are removed to ensure compatibility.
+        # Verbosity: 3 (info) prints the final statistics; 4 adds per-frame lines
+        cmd.extend(['--verbosity', str(self.verbosity)])
         
         return cmd
     
@@ -219,62 +525,39 @@ class VVCEncoder:
         Returns:
             Dictionary with statistics
         """
-        stats = {
-            'encoding_time': encoding_time,
-            'bitrate': 0.0,
-            'psnr_y': 0.0,
-            'psnr_u': 0.0,
-            'psnr_v': 0.0,
-            'frames': 0,
-        }
-        
         # Debug: log the actual output
-        self.logger.debug("VVenC output:")
-        self.logger.debug(output_text if output_text else "(empty)")
-        
-        # Parse bitrate - try multiple patterns
-        bitrate_patterns = [
-            r'avg_bitrate[=\s]+([\d.]+)\s+kbps',  # VVenC: avg_bitrate= 29914.88 kbps
-            r'Bitrate\s+([\d.]+)',  # VVenC table: Bitrate     Y-PSNR
-            r'Total Bitrate:\s+([\d.]+)\s+kbps',
-            r'bitrate.*?:\s+([\d.]+)\s+kbps',
-            r'avg bitrate\s+([\d.]+)\s+kbit/s',
-        ]
-        for pattern in bitrate_patterns:
-            bitrate_match = re.search(pattern, output_text, re.IGNORECASE)
-            if bitrate_match:
-                stats['bitrate'] = float(bitrate_match.group(1))
-                break
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug("VVenC output:")
+            self.logger.debug(output_text if output_text else "(empty)")
         
-        # Parse PSNR - VVenC outputs in table format after "Y-PSNR    U-PSNR    V-PSNR"
-        # Example: "          50    a   29914.8816   42.5487   50.7075   50.9686   43.9565"
-        psnr_patterns = [
-            # VVenC table format: Bitrate Y-PSNR U-PSNR V-PSNR
-            r'Y-PSNR\s+U-PSNR\s+V-PSNR.*?[\d]+\s+[a-z]?\s+[\d.]+\s+([\d.]+)\s+([\d.]+)\s+([\d.]+)',
-            # Standard format
-            r'Y-PSNR[:\s]+([\d.]+)\s+U-PSNR[:\s]+([\d.]+)\s+V-PSNR[:\s]+([\d.]+)',
-            r'PSNR.*?Y[:\s]+([\d.]+)\s+U[:\s]+([\d.]+)\s+V[:\s]+([\d.]+)',
-            r'Y\s+([\d.]+)\s+dB.*?U\s+([\d.]+)\s+dB.*?V\s+([\d.]+)\s+dB',
-        ]
-        for pattern in psnr_patterns:
-            psnr_match = re.search(pattern, output_text, re.IGNORECASE | re.DOTALL)
-            if psnr_match:
-                stats['psnr_y'] = float(psnr_match.group(1))
-                stats['psnr_u'] = float(psnr_match.group(2))
-                stats['psnr_v'] = float(psnr_match.group(3))
-                break
+        # Parse bitrate, PSNR and number of frames in one pass over the lines
+        parser = _StatsParser()
+        for line in output_text.splitlines():
+            parser.feed(line)
+        parser.finish(output_text)
         
-        # Parse number of frames
-        frames_patterns = [
-            r'(\d+)\s+frames',
-            r'frames.*?:\s*(\d+)',
-            r'encoded\s+(\d+)\s+frames',
-        ]
-        for pattern in frames_patterns:
-            frames_match = re.search(pattern, output_text, re.IGNORECASE)
-            if frames_match:
-                stats['frames'] = int(frames_match.group(1))
-                break
+        return self._collect_stats(parser, encoding_time)
+    
+    def _collect_stats(self, parser: '_StatsParser', encoding_time: float) -> Dict:
+        """
+        Build the statistics dictionary from a fed output parser
+        
+        Args:
+            parser: Parser that has seen the whole VVenC output
+            encoding_time: Measured encoding time
+            
+        Returns:
+            Dictionary with statistics
+        """
+        psnr_y, psnr_u, psnr_v = parser.psnr[1]
+        stats = {
+            'encoding_time': encoding_time,
+            'bitrate': parser.bitrate[1],
+            'psnr_y': psnr_y,
+            'psnr_u': psnr_u,
+            'psnr_v': psnr_v,
+            'frames': parser.frames[1],
+        }
         
         # If parsing failed, log warning
         if stats['bitrate'] == 0.0 or stats['psnr_y'] == 0.0:
@@ -305,9 +588,14 @@ class VVCEncoder:
             Encoding statistics
         """
         # Create temporary QP map file
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.txt', delete=False) as f:
-            qp_map_file = f.name
-            self._write_qp_map_file(f, qp_map_array)
+        if self.binary_qp_map:
+            with tempfile.NamedTemporaryFile(mode='wb', suffix='.bin', dir=_QP_MAP_TMP_DIR, delete=False) as f:
+                qp_map_file = f.name
+                self._write_qp_map_binary(f, qp_map_array)
+        else:
+            with tempfile.NamedTemporaryFile(mode='w', suffix='.txt', dir=_QP_MAP_TMP_DIR, delete=False) as f:
+                qp_map_file = f.name
+                self._write_qp_map_file(f, qp_map_array)
         
         try:
             # Encode with QP map
@@ -319,8 +607,10 @@ class VVCEncoder:
             return stats
         finally:
             # Clean up temporary file
-            if os.path.exists(qp_map_file):
-                os.remove(qp_map_file)
+            try:
+                os.unlink(qp_map_file)
+            except FileNotFoundError:
+                pass
     
     def _write_qp_map_file(self, f, qp_map_array: 'np.ndarray') -> None:
         """
@@ -332,18 +622,29 @@ class VVCEncoder:
         """
         n_ctu_h, n_ctu_w = qp_map_array.shape
         
-        # Write header
-        f.write(f"# QP Map for VVenC\n")
-        f.write(f"# CTU size: {self.ctu_size}x{self.ctu_size}\n")
-        f.write(f"# Grid: {n_ctu_h}x{n_ctu_w}\n")
-        f.write(f"\n")
-        
-        # Write QP values
-        for i in range(n_ctu_h):
-            for j in range(n_ctu_w):
-                qp = int(qp_map_array[i, j])
-                f.write(f"{qp} ")
-            f.write("\n")
+        # Header and QP values built as one string and written in one call;
+        # the row template is repeated and filled by a single % in C
+        qp_values = qp_map_array.astype(np.int32, copy=False).ravel().tolist()
+        row_template = '%d ' * n_ctu_w + '\n'
+        f.write(
+            f"# QP Map for VVenC\n"
+            f"# CTU size: {self.ctu_size}x{self.ctu_size}\n"
+            f"# Grid: {n_ctu_h}x{n_ctu_w}\n"
+            f"\n"
+            + (row_template * n_ctu_h) % tuple(qp_values)
+        )
+    
+    @staticmethod
+    def _write_qp_map_binary(f, qp_map_array: 'np.ndarray') -> None:
+        """
+        Write QP map as raw uint8 values, row-major, no header
+        
+        Args:
+            f: Binary file handle
+            qp_map_array: QP map array (n_ctu_h, n_ctu_w)
+        """
+        # QPs are 0-63: one byte each, written in a single call
+        f.write(np.ascontiguousarray(np.clip(qp_map_array, 0, 63), dtype=np.uint8).tobytes())
     
     def get_encoder_info(self) -> Dict:
         """
@@ -352,18 +653,26 @@ class VVCEncoder:
         Returns:
             Dictionary with encoder info
         """
+        if self._info is not None:
+            return dict(self._info)
+        
         try:
-            result = subprocess.run(
-                [self.vvenc_path, '--version'],
-                capture_output=True,
-                text=True,
-                timeout=5
-            )
+            # Reuse the --version output captured while locating vvencapp
+            version_text = _VVENC_VERSION_CACHE.get(self.vvenc_path)
+            if version_text is None:
+                result = subprocess.run(
+                    [self.vvenc_path, '--version'],
+                    capture_output=True,
+                    text=True,
+                    timeout=5
+                )
+                version_text = result.stdout
+                _VVENC_VERSION_CACHE[self.vvenc_path] = version_text
             
-            version_match = re.search(r'vvencapp:\s+([\d.]+)', result.stdout)
+            version_match = _VERSION_RE.search(version_text)
             version = version_match.group(1) if version_match else 'unknown'
             
-            return {
+            self._info = {
                 'software': 'VVenC',
                 'version': version,
                 'path': self.vvenc_path,
@@ -371,6 +680,7 @@ class VVCEncoder:
                 'config': self.config_type,
                 'threads': self.threads,
             }
+            return dict(self._info)
         except Exception as e:
             self.logger.error(f"Failed to get encoder info: {e}")
             return {'software': 'VVenC', 'version': 'unknown'}